@@ -0,0 +1,119 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Check the composed text layouts of pixelcard.libs.glyphs against faebryk on
+the real font, and time both.
+
+- polygons: equal to font.string_to_polygons, coordinate by coordinate and in
+  the same order
+- LEDs: the same count as FontLayout.get_count(), all inside the polygons.
+  FontLayout's positions are random, so they are compared by their spacing:
+  the mean and the minimum distance of every LED to its nearest neighbour.
+
+Run from the project root:
+> python benchmarks/fontlayout_check.py --text "PixelCard" --text "Hello World"
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import typer
+from faebryk.exporters.pcb.layout.font import FontLayout
+from faebryk.libs.font import Font
+from pixelcard.board import TEXT_BBOX
+from pixelcard.libs.glyphs import get_glyph_cache, text_layout
+from pixelcard.main import fetch_font
+from shapely.geometry import Point
+
+# mm, LEDs of FontLayout lie inside their polygon, composed ones may be moved
+# off it by the rounding of the move
+INSIDE_TOLERANCE = 1e-9
+
+
+def spacing(leds: list[tuple[float, float]]) -> tuple[float, float]:
+    """
+    mean and minimum distance of the LEDs to their nearest neighbour in mm
+    """
+
+    if len(leds) < 2:
+        return float("nan"), float("nan")
+    points = np.array(leds)
+    distances = np.linalg.norm(points[:, None] - points[None, :], axis=-1)
+    np.fill_diagonal(distances, np.inf)
+    nearest = distances.min(axis=1)
+    return float(nearest.mean()), float(nearest.min())
+
+
+def main(
+    text: list[str] = typer.Option(
+        ["Pi", "PixelCard", "Hello World", "AAAA WWWW", "PixelCard PixelCard"],
+        help="Card texts",
+    ),
+    font_size: float = typer.Option(20, help="Font size in mm"),
+    density: float = typer.Option(0.13, help="LED density"),
+    scale_to_fit: bool = typer.Option(False, help="Scale the text into the bbox"),
+):
+    font = Font(fetch_font(Path("./build")))
+
+    print(
+        f"{'text':<24}{'polygons':>9}{'LEDs':>11}{'spacing [mm]':>26}"
+        f"{'FontLayout [ms]':>17}{'composed [ms]':>15}"
+    )
+    failed = False
+    for led_text in text:
+        start = time.perf_counter()
+        polygons = font.string_to_polygons(
+            led_text, font_size, bbox=TEXT_BBOX, scale_to_fit=scale_to_fit
+        )
+        layout = FontLayout(
+            font=font,
+            text=led_text,
+            font_size=font_size,
+            density=density,
+            bbox=TEXT_BBOX,
+            scale_to_fit=scale_to_fit,
+        )
+        t_reference = time.perf_counter() - start
+
+        start = time.perf_counter()
+        composed = text_layout(
+            font,
+            led_text,
+            font_size,
+            density,
+            bbox=TEXT_BBOX,
+            scale_to_fit=scale_to_fit,
+        )
+        t_composed = time.perf_counter() - start
+
+        same_polygons = [list(p.exterior.coords) for p in polygons] == [
+            list(p.exterior.coords) for p in composed.polygons
+        ]
+        same_count = layout.get_count() == len(composed.leds)
+        inside = all(
+            any(p.buffer(INSIDE_TOLERANCE).contains(Point(led)) for p in polygons)
+            for led in composed.leds
+        )
+        failed |= not (same_polygons and same_count and inside)
+
+        mean_ref, min_ref = spacing(layout.coords)
+        mean_composed, min_composed = spacing(composed.leds)
+        print(
+            f"{led_text:<24}{'same' if same_polygons else 'DIFFER':>9}"
+            f"{layout.get_count():>5} {len(composed.leds):>5}"
+            f"{mean_ref:>7.2f}/{min_ref:.2f} vs {mean_composed:.2f}/{min_composed:.2f}"
+            f"{'' if inside else ' OUTSIDE'}"
+            f"{t_reference * 1000:>17.1f}{t_composed * 1000:>15.1f}"
+        )
+
+    cache = get_glyph_cache(font)
+    print(f"LED patterns: {cache.hits} reused, {cache.misses} drawn")
+
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
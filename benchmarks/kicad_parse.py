@@ -0,0 +1,114 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Parse time and memory of kicad_pcb boards with sexpdata (what faebryk uses),
+the streaming loader in pixelcard.libs.sexp and the parse cache.
+
+The boards are synthetic: the header of source/main.kicad_pcb plus its
+footprints repeated up to the requested count, with unique references and
+uuids.
+
+Run from the project root:
+> python benchmarks/kicad_parse.py --sizes 100 --sizes 1000 --sizes 5000
+"""
+
+import re
+import tempfile
+import time
+import tracemalloc
+from itertools import count
+from pathlib import Path
+from typing import Callable
+
+import sexpdata
+import typer
+from pixelcard.libs.parse_cache import ParseCache
+from pixelcard.libs.sexp import iter_items, loads
+
+TEMPLATE = Path(__file__).parent.parent.joinpath("source", "main.kicad_pcb")
+
+_UUID = re.compile(r'\(uuid "[^"]*"\)')
+_REFERENCE = re.compile(r'\(property "Reference" "[^"]*"')
+
+
+def synthetic_board(template: str, footprints: int) -> str:
+    items = [template[start:end] for start, end in iter_items(template)]
+    header = [item for item in items if not item.startswith("(footprint")]
+    originals = [item for item in items if item.startswith("(footprint")]
+
+    uuids = count()
+    out = []
+    for i in range(footprints):
+        item = originals[i % len(originals)]
+        item = _REFERENCE.sub(f'(property "Reference" "X{i}"', item, count=1)
+        item = _UUID.sub(
+            lambda _: f'(uuid "00000000-0000-0000-0000-{next(uuids):012d}")', item
+        )
+        out.append(item)
+
+    return "(kicad_pcb\n\t" + "\n\t".join(header + out) + "\n)\n"
+
+
+def measure(fn: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """
+    best time in s, peak memory in MiB
+    """
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(durations), peak / 2**20
+
+
+def main(
+    sizes: list[int] = typer.Option([100, 1000, 5000], help="Footprint counts"),
+    repeat: int = typer.Option(3, help="Best of n runs"),
+):
+    template = TEMPLATE.read_text()
+
+    print(
+        f"{'footprints':>10} {'size [MiB]':>10} {'loader':>14}"
+        f" {'time [ms]':>10} {'peak [MiB]':>10}"
+    )
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("board.kicad_pcb")
+            path.write_text(synthetic_board(template, n))
+            text = path.read_text()
+            assert loads(text) == sexpdata.loads(text)
+
+            cache_dir = Path(tmp).joinpath("cache")
+
+            def cache_miss():
+                ParseCache(cache_dir, "cold").load(path, loads)
+                for entry in cache_dir.joinpath("cold").glob("*.pickle"):
+                    entry.unlink()
+
+            warm = ParseCache(cache_dir, "warm")
+            warm.load(path, loads)
+
+            loaders = {
+                "sexpdata": lambda: sexpdata.loads(path.read_text()),
+                "streaming": lambda: loads(path.read_text()),
+                "cache miss": cache_miss,
+                "cache hit": lambda: warm.load(path, loads),
+            }
+            for name, fn in loaders.items():
+                duration, peak = measure(fn, repeat)
+                print(
+                    f"{n:>10} {len(text) / 2**20:>10.1f} {name:>14}"
+                    f" {duration * 1000:>10.1f} {peak:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    typer.run(main)
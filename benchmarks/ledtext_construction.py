@@ -0,0 +1,89 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Compare LEDText construction from a shared LEDCellTemplate against the old
+per-LED construction, where every cell allocated its own layout objects and
+its own layout and routing traits.
+
+Run from the project root:
+> python benchmarks/ledtext_construction.py
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import typer
+from faebryk.core.util import get_all_nodes
+from faebryk.library.has_pcb_layout import has_pcb_layout
+from faebryk.library.has_pcb_layout_defined import has_pcb_layout_defined
+from faebryk.library.has_pcb_routing_strategy import has_pcb_routing_strategy
+from faebryk.library.has_pcb_routing_strategy_greedy_direct_line import (
+    has_pcb_routing_strategy_greedy_direct_line,
+)
+from faebryk.library.PoweredLED import PoweredLED
+from pixelcard.main import RECURSION_LIMIT, load_font
+from pixelcard.modules.LEDText import LEDCellTemplate, LEDText, cell_layout
+
+
+class PerCellTemplate(LEDCellTemplate):
+    """
+    Reproduces the construction before templates: every cell gets freshly
+    allocated layout objects and its own layout and routing traits.
+    """
+
+    def stamp(self) -> PoweredLED:
+        cell = PoweredLED()
+        cell.NODEs.led.PARAMs.color.merge(self.color)
+        cell.NODEs.led.PARAMs.brightness.merge(self.brightness)
+
+        cell.add_trait(has_pcb_layout_defined(cell_layout()))
+        cell.add_trait(has_pcb_routing_strategy_greedy_direct_line())
+        return cell
+
+
+def count_traits(ledtext: LEDText) -> int:
+    return sum(
+        node.has_trait(has_pcb_layout) + node.has_trait(has_pcb_routing_strategy)
+        for node in [ledtext, *get_all_nodes(ledtext)]
+    )
+
+
+def measure(text: str, template: LEDCellTemplate, font) -> tuple[int, float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    ledtext = LEDText(text=text, font=font, font_size=20, template=template)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return len(ledtext.NODEs.leds), duration, peak, count_traits(ledtext)
+
+
+def main(
+    texts: list[str] = typer.Argument(None, help="Texts to build"),
+):
+    sys.setrecursionlimit(RECURSION_LIMIT)
+    font = load_font(Path("./build"))
+    texts = texts or ["Pixel", "PixelCard", "PixelCard PixelCard"]
+
+    print(
+        f"{'text':<24}{'mode':<10}{'leds':>6}{'time [s]':>10}{'peak [MiB]':>12}"
+        f"{'traits':>8}"
+    )
+    for text in texts:
+        for mode, template in [
+            ("per-cell", PerCellTemplate()),
+            ("template", LEDCellTemplate()),
+        ]:
+            count, duration, peak, traits = measure(text, template, font)
+            print(
+                f"{text:<24}{mode:<10}{count:>6}{duration:>10.3f}"
+                f"{peak / 2**20:>12.2f}{traits:>8}"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
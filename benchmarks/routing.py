@@ -0,0 +1,113 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Compare the track topologies of has_pcb_routing_strategy_spatial against
+faebryk's has_pcb_routing_strategy_greedy_direct_line on the LEDText of real
+cards, for routing time and total track length.
+
+Every card is built offline (font and parts from the local caches), picked
+and placed on a scratch copy of the KiCad project like main.py does, then
+every strategy is attached to the LEDText in turn and only its calculate() is
+timed. The spatial strategies route the cell nets on F.Cu and the hv power net
+on B.Cu, like main.py --power-routing does. The greedy one routes all nets.
+
+Run from the project root:
+> python benchmarks/routing.py --texts Pi --texts PixelCard --texts PixelCardPixel
+"""
+
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import typer
+
+BUILD_DIR = Path("./build")
+
+
+def route_length(routes) -> float:
+    from faebryk.exporters.pcb.routing.util import Path as FPath
+
+    return sum(
+        math.dist(a, b)
+        for route in routes
+        for track in route.path.path
+        if isinstance(track, FPath.Track)
+        for a, b in zip(track.points, track.points[1:])
+    )
+
+
+def main(
+    texts: list[str] = typer.Option(
+        ["Pi", "PixelCard", "PixelCardPixel"], help="Card texts"
+    ),
+    repeat: int = typer.Option(3, help="Best of n runs"),
+):
+    from faebryk.library.has_pcb_routing_strategy_greedy_direct_line import (
+        has_pcb_routing_strategy_greedy_direct_line,
+    )
+    from faebryk.libs.app.parameters import replace_tbd_with_any
+    from faebryk.libs.picker.picker import pick_part_recursively
+    from pixelcard.app import PixelCard
+    from pixelcard.batch import prepare_project
+    from pixelcard.library.has_pcb_routing_strategy_spatial import (
+        has_pcb_routing_strategy_spatial,
+    )
+    from pixelcard.libs.font import CachedFont
+    from pixelcard.main import RECURSION_LIMIT, fetch_font, setup_part_library
+    from pixelcard.pcb import place_design
+    from pixelcard.pickers import pick
+
+    Topology = has_pcb_routing_strategy_spatial.Topology
+
+    sys.setrecursionlimit(RECURSION_LIMIT)
+    setup_part_library(BUILD_DIR)
+    font = CachedFont(fetch_font(BUILD_DIR))
+
+    def spatial(text, topology: Topology):
+        hv = text.IFs.power.IFs.hv
+        return has_pcb_routing_strategy_spatial(
+            {hv: topology}, default=topology, layers={hv: "B.Cu"}
+        )
+
+    strategies = {
+        "greedy": lambda _: has_pcb_routing_strategy_greedy_direct_line(),
+        "mst": lambda text: spatial(text, Topology.MST),
+        "row_chain": lambda text: spatial(text, Topology.ROW_CHAIN),
+    }
+
+    print(
+        f"{'text':>16} {'leds':>6} {'router':>10} {'routes':>7}"
+        f" {'time [ms]':>10} {'length [mm]':>12}"
+    )
+    for led_text in texts:
+        card = PixelCard(font=font, _text=led_text, contact_info="Benchmark")
+        replace_tbd_with_any(card, recursive=True)
+        pick_part_recursively(card, pick)
+        text = card.NODEs.text
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pcbfile = prepare_project(Path(tmp))
+            transformer = place_design(
+                pcbfile, Path(tmp).joinpath("faebryk.net"), card.get_graph(), card
+            )
+
+        for name, factory in strategies.items():
+            strategy = factory(text)
+            text.add_trait(strategy)
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                routes = strategy.calculate(transformer)
+                durations.append(time.perf_counter() - start)
+            print(
+                f"{led_text:>16} {len(text.NODEs.leds):>6} {name:>10}"
+                f" {len(routes):>7} {min(durations) * 1000:>10.1f}"
+                f" {route_length(routes):>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,210 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Scaling benchmarks over text length, font size and LED density.
+
+Every point builds a full card offline (font and parts from the local caches)
+with build_card, like main.py does, and records the LED count and the time of
+construction, picking, checks and apply_design. Every point runs in a fresh
+process with cold caches. The peak memory (tracemalloc) is measured in a
+second, separate process, because tracing slows the build down and would
+distort the times.
+
+Run from the project root:
+> python benchmarks/scaling.py run --out new.json
+> python benchmarks/scaling.py compare benchmarks/baselines/<machine>.json new.json
+
+Baselines are machine specific, so none is committed. To create one, run
+`run` on the machine (and faebryk version) to compare on, with nothing else
+running, from a clean checkout of the reference commit, and store it under
+benchmarks/baselines/<machine>.json. The results record the faebryk and
+python versions they were taken with.
+"""
+
+import json
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from importlib.metadata import version
+from pathlib import Path
+
+import typer
+
+app = typer.Typer()
+
+BUILD_DIR = Path("./build")
+BASE_TEXT = "PixelCard"
+
+METRICS = ["construct_s", "pick_s", "checks_s", "apply_design_s", "peak_mib"]
+
+
+@dataclass(frozen=True)
+class Point:
+    text_length: int
+    font_size: float
+    density: float
+
+    @property
+    def key(self) -> str:
+        return f"len={self.text_length} size={self.font_size} density={self.density}"
+
+    @property
+    def text(self) -> str:
+        return (BASE_TEXT * (self.text_length // len(BASE_TEXT) + 1))[
+            : self.text_length
+        ]
+
+
+@dataclass
+class Result:
+    point: Point
+    leds: int
+    construct_s: float
+    pick_s: float
+    checks_s: float
+    apply_design_s: float
+    peak_mib: float | None = None
+
+
+def measure(point: Point, memory: bool) -> Result:
+    """
+    memory: trace memory, the times of such a run are inflated
+    """
+
+    # imported here, so every point pays for its imports in its own process
+    from pixelcard.app import PixelCard
+    from pixelcard.batch import prepare_project
+    from pixelcard.libs.font import CachedFont
+    from pixelcard.libs.profiling import StageProfiler
+    from pixelcard.main import (
+        RECURSION_LIMIT,
+        build_card,
+        fetch_font,
+        setup_part_library,
+    )
+
+    sys.setrecursionlimit(RECURSION_LIMIT)
+    setup_part_library(BUILD_DIR)
+
+    # cached, or from a mirror when offline; no polygon cache, points run cold
+    font = CachedFont(fetch_font(BUILD_DIR))
+
+    profiler = StageProfiler(enabled=True, memory=memory)
+    with profiler.stage("construct"):
+        card = PixelCard(
+            font=font,
+            _text=point.text,
+            contact_info="Benchmark",
+            font_size=point.font_size,
+            led_density=point.density,
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pcbfile = prepare_project(Path(tmp))
+        build_card(card, pcbfile, Path(tmp).joinpath("faebryk.net"), profiler=profiler)
+
+    stages = {stage.name: stage for stage in profiler.stages}
+    peaks = [s.peak_memory_bytes for s in profiler.stages if s.peak_memory_bytes]
+    return Result(
+        point=point,
+        leds=len(card.NODEs.text.NODEs.leds),
+        construct_s=stages["construct"].wall_time_s,
+        pick_s=stages["pick"].wall_time_s,
+        checks_s=stages["checks"].wall_time_s,
+        apply_design_s=stages["apply_design"].wall_time_s,
+        peak_mib=max(peaks) / 2**20 if memory and peaks else None,
+    )
+
+
+def _in_fresh_process(point: Point, memory: bool) -> Result:
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(measure, point, memory).result()
+
+
+def sweep(
+    lengths: list[int], font_sizes: list[float], densities: list[float]
+) -> list[Point]:
+    """
+    One axis at a time around the default card (9 chars, size 20, 0.13/mm^2).
+    """
+
+    default = Point(len(BASE_TEXT), 20, 0.13)
+    points = [default]
+    points += [Point(n, default.font_size, default.density) for n in lengths]
+    points += [Point(default.text_length, s, default.density) for s in font_sizes]
+    points += [Point(default.text_length, default.font_size, d) for d in densities]
+    return list(dict.fromkeys(points))
+
+
+@app.command()
+def run(
+    out: Path = typer.Option(..., help="Where to write the results (json)"),
+    lengths: list[int] = typer.Option([4, 9, 18, 36], help="Text lengths"),
+    font_sizes: list[float] = typer.Option([10, 20, 30], help="Font sizes"),
+    densities: list[float] = typer.Option([0.06, 0.13, 0.25], help="LEDs per mm^2"),
+    memory: bool = typer.Option(True, help="Measure the peak memory in a 2nd pass"),
+):
+    results = []
+    for point in sweep(lengths, font_sizes, densities):
+        # fresh process per point: isolated memory peak and cold caches
+        result = _in_fresh_process(point, memory=False)
+        if memory:
+            result.peak_mib = _in_fresh_process(point, memory=True).peak_mib
+        peak = "-" if result.peak_mib is None else f"{result.peak_mib:7.1f}MiB"
+        print(
+            f"{point.key:<40} leds {result.leds:5d}"
+            f" construct {result.construct_s:7.3f}s pick {result.pick_s:7.3f}s"
+            f" checks {result.checks_s:7.3f}s"
+            f" apply_design {result.apply_design_s:7.3f}s peak {peak}"
+        )
+        results.append(result)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(
+        json.dumps(
+            {
+                "faebryk": version("faebryk"),
+                "python": sys.version.split()[0],
+                "results": {r.point.key: asdict(r) for r in results},
+            },
+            indent=4,
+        )
+    )
+
+
+@app.command()
+def compare(
+    baseline: Path = typer.Argument(..., help="Baseline results (json)"),
+    current: Path = typer.Argument(..., help="New results (json)"),
+    tolerance: float = typer.Option(0.2, help="Allowed relative slowdown/growth"),
+):
+    base = json.loads(baseline.read_text())["results"]
+    new = json.loads(current.read_text())["results"]
+
+    regressions = 0
+    for key in base.keys() & new.keys():
+        if base[key]["leds"] != new[key]["leds"]:
+            print(f"{key:<40} leds changed {base[key]['leds']} -> {new[key]['leds']}")
+        for metric in METRICS:
+            old_value, new_value = base[key].get(metric), new[key].get(metric)
+            if old_value is None or new_value is None:
+                continue
+            if new_value > old_value * (1 + tolerance):
+                regressions += 1
+                print(
+                    f"{key:<40} REGRESSION {metric}: {old_value:.3f} -> {new_value:.3f}"
+                )
+
+    for key in base.keys() - new.keys():
+        print(f"{key:<40} missing in {current}")
+
+    if regressions:
+        print(f"{regressions} regressions above {tolerance:.0%}")
+        raise typer.Exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    app()
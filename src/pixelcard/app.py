@@ -7,7 +7,11 @@ from faebryk.core.core import Module
 from faebryk.library.has_overriden_name_defined import has_overriden_name_defined
 from faebryk.library.Net import Net
 from faebryk.libs.font import Font
+from pixelcard.board import TEXT_BBOX, TEXT_MARGIN
 from pixelcard.library.Faebryk_Logo import Faebryk_Logo
+from pixelcard.library.has_pcb_routing_strategy_spatial import (
+    has_pcb_routing_strategy_spatial,
+)
 from pixelcard.modules.LEDText import LEDText
 from pixelcard.modules.USB_C_5V_PSU_16p_Receptical import USB_C_5V_PSU_16p_Receptical
 
@@ -16,7 +20,14 @@ logger = logging.getLogger(__name__)
 
 class PixelCard(Module):
     def __init__(
-        self, font: Font, _text: str = "REPLACE", contact_info: str = ""
+        self,
+        font: Font,
+        _text: str = "REPLACE",
+        contact_info: str = "",
+        font_size: float = 20,
+        led_density: float = 0.13,
+        power_routing: dict[str, tuple[has_pcb_routing_strategy_spatial.Topology, str]]
+        | None = None,
     ) -> None:
         super().__init__()
 
@@ -24,14 +35,14 @@ class PixelCard(Module):
         self.contact_info = contact_info
         self.font = font
 
-        text_margin = 4
         self.font_settings = {
             "text": _text,
             "font": font,
-            "font_size": 20,
-            "bbox": (85.6 - text_margin * 2, 53.98 - text_margin * 2),
+            "font_size": font_size,
+            "led_density": led_density,
+            "bbox": TEXT_BBOX,
             "scale_to_fit": False,
-            "pcb_offset": (text_margin, text_margin),
+            "pcb_offset": (TEXT_MARGIN, TEXT_MARGIN),
         }
 
         # ----------------------------------------
@@ -44,6 +55,8 @@ class PixelCard(Module):
                 font_size=self.font_settings["font_size"],
                 bbox=self.font_settings["bbox"],
                 scale_to_fit=self.font_settings["scale_to_fit"],
+                density=self.font_settings["led_density"],
+                power_routing=power_routing,
             )
             usb_psu = USB_C_5V_PSU_16p_Receptical()
             faebryk_logo = Faebryk_Logo()
@@ -0,0 +1,244 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Batch entrypoint: builds one PixelCard per row of a CSV or JSONL file.
+
+Every worker process pays the cold start (faebryk import, font load, part
+library setup) once and then builds as many cards as it is handed.
+Each row gets its own output directory containing a copy of the KiCad project,
+the netlist and optionally the manufacturing artifacts.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import typer
+from pixelcard.main import RECURSION_LIMIT, ROOT, fetch_font
+
+# faebryk and the app are imported by the workers, so reading and validating
+# the rows stays cheap
+if TYPE_CHECKING:
+    from faebryk.libs.font import Font
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CardRow:
+    index: int
+    led_text: str
+    contact_info: str
+
+    @property
+    def dirname(self) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", self.led_text).strip("_") or "card"
+        return f"{self.index:04d}_{slug[:32]}"
+
+
+@dataclass(frozen=True)
+class CardResult:
+    row: CardRow
+    out_dir: Path
+    error: str | None = None
+
+
+def read_rows(rows_file: Path) -> list[CardRow]:
+    """
+    Read (led_text, contact_info) rows from a CSV file with a header line or
+    from a JSONL file with one object per line.
+
+    All rows are validated before any card is built. Raises ValueError listing
+    every invalid row with its line number in rows_file.
+    """
+
+    # (line number, record)
+    records: list[tuple[int, object]] = []
+    errors: list[tuple[int, str]] = []
+    if rows_file.suffix == ".jsonl":
+        with rows_file.open() as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append((line_number, json.loads(line)))
+                except ValueError as e:
+                    errors.append((line_number, f"invalid JSON ({e})"))
+    else:
+        with rows_file.open(newline="") as f:
+            reader = csv.DictReader(f)
+            records = [(reader.line_num, record) for record in reader]
+
+    rows = []
+    for line_number, record in records:
+        if not isinstance(record, dict):
+            errors.append((line_number, "expected an object"))
+            continue
+        led_text = record.get("led_text")
+        # csv yields None for missing trailing columns
+        contact_info = record.get("contact_info") or ""
+        if not isinstance(led_text, str) or not led_text.strip():
+            errors.append((line_number, "missing led_text"))
+            continue
+        if not isinstance(contact_info, str):
+            errors.append((line_number, "contact_info is not a string"))
+            continue
+        rows.append(CardRow(len(rows), led_text, contact_info))
+
+    if errors:
+        raise ValueError(
+            "\n".join(f"{rows_file}:{line}: {error}" for line, error in sorted(errors))
+        )
+    return rows
+
+
+def prepare_project(out_dir: Path) -> Path:
+    """
+    Copy the KiCad project template into out_dir and return the pcb file path.
+    Library paths are made absolute so the copy still finds the footprints.
+    out_dir is emptied first, nothing of an earlier build into it is kept.
+    """
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    src = ROOT.joinpath("source")
+    prj = out_dir.joinpath("source")
+    prj.mkdir(parents=True, exist_ok=True)
+
+    for name in ["main.kicad_pcb", "main.kicad_pro"]:
+        shutil.copy(src.joinpath(name), prj.joinpath(name))
+
+    fp_lib_table = src.joinpath("fp-lib-table").read_text()
+    prj.joinpath("fp-lib-table").write_text(
+        fp_lib_table.replace("${KIPRJMOD}/../libs", ROOT.joinpath("libs").as_posix())
+    )
+
+    return prj.joinpath("main.kicad_pcb")
+
+
+# worker ---------------------------------------------------
+
+_font: "Font | None" = None
+_export_artifacts = False
+_cache_dir: Path | None = None
+
+
+def _init_worker(build_dir: Path, export_artifacts: bool):
+    from faebryk.libs.logging import setup_basic_logging
+    from pixelcard.main import load_font, setup_part_library
+
+    global _font, _export_artifacts, _cache_dir
+
+    setup_basic_logging()
+    sys.setrecursionlimit(RECURSION_LIMIT)
+
+    setup_part_library(build_dir)
+    _font = load_font(build_dir)
+    _export_artifacts = export_artifacts
+    _cache_dir = build_dir.joinpath("cache")
+
+
+def _worker_ready(barrier) -> int:
+    """
+    Blocks until every worker of the pool runs it, see CardService.
+    """
+
+    barrier.wait(timeout=600)
+    return os.getpid()
+
+
+def _build_row(
+    row: CardRow, out_dir: Path, export_artifacts: bool | None = None
+) -> CardResult:
+    from pixelcard.app import PixelCard
+    from pixelcard.main import build_card
+
+    assert _font is not None, "worker not initialized"
+    if export_artifacts is None:
+        export_artifacts = _export_artifacts
+
+    try:
+        pcbfile = prepare_project(out_dir)
+        netlist_path = out_dir.joinpath("faebryk", "faebryk.net")
+        netlist_path.parent.mkdir(parents=True, exist_ok=True)
+
+        app = PixelCard(
+            font=_font,
+            _text=row.led_text,
+            contact_info=row.contact_info,
+        )
+        build_card(
+            app,
+            pcbfile,
+            netlist_path,
+            out_dir.joinpath("manufacturing_artifacts") if export_artifacts else None,
+            cache_dir=_cache_dir,
+        )
+    except Exception as e:
+        logger.exception(f"Card {row.index} ({row.led_text}) failed")
+        return CardResult(row, out_dir, error=f"{type(e).__name__}: {e}")
+
+    return CardResult(row, out_dir)
+
+
+# ----------------------------------------------------------
+
+
+def main(
+    rows_file: Path = typer.Argument(
+        ..., help="CSV (with header) or JSONL file with led_text, contact_info."
+    ),
+    out_dir: Path = typer.Option(
+        Path("./build/batch"), help="Directory for the per-card outputs"
+    ),
+    jobs: int = typer.Option(0, help="Number of worker processes (0: CPU count)"),
+    export_artifacts: bool = typer.Option(False, help="Export PCBA artifacts"),
+):
+    build_dir = Path("./build")
+    try:
+        rows = read_rows(rows_file)
+    except ValueError as e:
+        logger.error(f"Invalid rows:\n{e}")
+        raise typer.Exit(1)
+    logger.info(f"Building {len(rows)} cards from {rows_file}")
+
+    # download the font once up front, not once per worker
+    fetch_font(build_dir)
+
+    failed: list[CardResult] = []
+    with ProcessPoolExecutor(
+        max_workers=jobs or None,
+        initializer=_init_worker,
+        initargs=(build_dir, export_artifacts),
+    ) as pool:
+        futures = [
+            pool.submit(_build_row, row, out_dir.joinpath(row.dirname)) for row in rows
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if result.error:
+                failed.append(result)
+                continue
+            logger.info(f"Built card {result.row.index} in {result.out_dir}")
+
+    for result in sorted(failed, key=lambda r: r.row.index):
+        logger.error(f"Card {result.row.index} ({result.row.led_text}): {result.error}")
+
+    logger.info(f"Built {len(rows) - len(failed)}/{len(rows)} cards into {out_dir}")
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    from faebryk.libs.logging import setup_basic_logging
+
+    setup_basic_logging()
+    typer.run(main)
@@ -0,0 +1,132 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Board constants and edits of the kicad_pcb text that need neither faebryk nor
+the app, so the contact info only path stays cheap to import.
+"""
+
+import logging
+import re
+from pathlib import Path
+from uuid import uuid4
+
+from pixelcard.libs.sexp import iter_items, quote
+
+logger = logging.getLogger(__name__)
+
+CREDITCARD_WIDTH = 85.6
+CREDITCARD_HEIGHT = 53.98
+CREDITCARD_CORNER_RADIUS = 3.18
+
+# space between the LED text and the card edge
+TEXT_MARGIN = 4
+TEXT_BBOX = (CREDITCARD_WIDTH - TEXT_MARGIN * 2, CREDITCARD_HEIGHT - TEXT_MARGIN * 2)
+# mm, well below what the silkscreen can resolve
+TEXT_SIMPLIFY_TOLERANCE = 0.01
+
+# (x, y, rotation) in mm/degrees
+Placement = tuple[float, float, float]
+
+
+def get_text_bottom(polygons: list) -> float:
+    """
+    Lowest edge of the text on the card, the polygons are in text coordinates.
+    """
+
+    return max(p.bounds[3] for p in polygons) + TEXT_MARGIN
+
+
+def get_usb_c_placement(text_bottom: float) -> Placement:
+    # right edge, centered in the space below the text
+    return (
+        CREDITCARD_WIDTH - 4.5,
+        text_bottom + (CREDITCARD_HEIGHT - text_bottom) / 2,
+        90,
+    )
+
+
+def get_logo_placement(text_bottom: float) -> Placement:
+    return (
+        CREDITCARD_WIDTH / 2,
+        text_bottom + (CREDITCARD_HEIGHT - text_bottom) / 2,
+        0,
+    )
+
+
+# suffix faebryk gives the uuids of the objects it generated ("FBRK")
+FAEBRYK_UUID_MARK = "4642524b"
+
+
+def get_contact_info_lines(contact_info: str) -> list[tuple[str, tuple[float, float]]]:
+    return [
+        (line, (CREDITCARD_WIDTH / 3, CREDITCARD_HEIGHT / 3 + i * 5))
+        for i, line in enumerate(contact_info.split("\\n"))
+    ]
+
+
+def get_contact_info_face(font_path: Path) -> tuple[str, bool]:
+    font_name = font_path.stem
+    bold = False
+    if "-Bold" in font_name:
+        font_name, _ = font_name.split("-Bold")
+        bold = True
+    return font_name, bold
+
+
+def update_contact_info(pcbfile: Path, contact_info: str, font_path: Path):
+    """
+    Replace the contact info on the back of an already generated board.
+    Does the same as the contact info part of transform_pcb, but on the
+    kicad_pcb text directly, so the rest of the design does not need to be
+    rebuilt.
+    """
+
+    pcb = pcbfile.read_text()
+
+    contact_uuid = re.compile(rf'\(uuid "[0-9a-f-]*{FAEBRYK_UUID_MARK}"\)')
+    kept = []
+    last = 0
+    for start, end in iter_items(pcb):
+        item = pcb[start:end]
+        if not (
+            item.startswith("(gr_text ")
+            and '(layer "B.SilkS")' in item
+            and contact_uuid.search(item)
+        ):
+            continue
+        # drop the item including its indentation
+        kept.append(pcb[last : pcb.rfind("\n", 0, start) + 1])
+        last = end + 1 if pcb[end : end + 1] == "\n" else end
+    kept.append(pcb[last:])
+    pcb = "".join(kept)
+
+    def num(value: float) -> str:
+        return f"{value:.6f}".rstrip("0").rstrip(".")
+
+    font_name, bold = get_contact_info_face(font_path)
+    texts = [
+        "\n".join(
+            [
+                f"\t(gr_text {quote(line)}",
+                f"\t\t(at {num(x)} {num(y)} 0)",
+                '\t\t(layer "B.SilkS")',
+                f'\t\t(uuid "{str(uuid4())[:-8]}{FAEBRYK_UUID_MARK}")',
+                "\t\t(effects",
+                "\t\t\t(font",
+                f"\t\t\t\t(face {quote(font_name)})",
+                "\t\t\t\t(size 2 2)",
+                "\t\t\t\t(thickness 0.1)",
+                *(["\t\t\t\t(bold yes)"] if bold else []),
+                "\t\t\t)",
+                "\t\t\t(justify top mirror)",
+                "\t\t)",
+                "\t)",
+            ]
+        )
+        for line, (x, y) in get_contact_info_lines(contact_info)
+    ]
+
+    # insert before the closing parenthesis of the board
+    end = pcb.rstrip().rfind(")")
+    pcbfile.write_text(pcb[:end] + "\n".join(texts) + "\n" + pcb[end:])
@@ -0,0 +1,35 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Static data of the parts a card is built from.
+
+The pickers use these for their default options and the estimate uses them
+without building the faebryk graph, so both always agree. Kept free of faebryk
+imports on purpose.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class CatalogPart:
+    partno: str
+    description: str
+    params: dict[str, float] = field(default_factory=dict)
+
+
+LED_RED = CatalogPart(
+    "C965790",
+    "LED red 0402",
+    {"max_brightness": 300e-3, "forward_voltage": 2.1, "max_current": 20e-3},
+)
+RESISTOR_100R = CatalogPart("C25076", "Resistor 100R 1% 0402", {"resistance": 100})
+RESISTOR_5K1 = CatalogPart("C25905", "Resistor 5.1k 1% 0402", {"resistance": 5.1e3})
+CAPACITOR_100N = CatalogPart(
+    "C1525",
+    "Capacitor 100nF X7R 16V 0402",
+    {"capacitance": 100e-9, "rated_voltage": 16},
+)
+FUSE_1A = CatalogPart("C914087", "PTC fuse 1A resettable", {"trip_current": 1})
+USB_C_RECEPTACLE_16P = CatalogPart("C2765186", "USB-C receptacle 16 pin")
@@ -0,0 +1,199 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Quote numbers of a card without building it.
+
+The LED count comes from the text layout alone, the rest of the BOM is fixed by
+the design and resolved against the static part catalog. No faebryk graph is
+constructed and nothing is picked, so an estimate takes milliseconds once the
+glyphs are cached.
+
+The BOM mirrors what the full build picks: every LED cell is a red LED with the
+first resistor option (100R) as current limiter, the USB-C power supply adds
+the receptacle, fuse, CC resistors and its decoupling capacitor.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from faebryk.libs.font import Font
+from pixelcard.board import TEXT_BBOX
+from pixelcard.catalog import (
+    CAPACITOR_100N,
+    FUSE_1A,
+    LED_RED,
+    RESISTOR_5K1,
+    RESISTOR_100R,
+    USB_C_RECEPTACLE_16P,
+    CatalogPart,
+)
+from pixelcard.libs.glyphs import text_layout
+from pixelcard.libs.partstore import EASYEDA_CACHE, PartsStore
+
+logger = logging.getLogger(__name__)
+
+SUPPLY_VOLTAGE = 5.0
+
+
+@dataclass(frozen=True)
+class BOMLine:
+    part: CatalogPart
+    quantity: int
+    unit_price: float | None  # USD, None if unknown
+
+    @property
+    def price(self) -> float | None:
+        return None if self.unit_price is None else self.unit_price * self.quantity
+
+
+@dataclass(frozen=True)
+class Estimate:
+    led_count: int
+    bom: list[BOMLine]
+    led_current: float  # A per LED
+    led_max_current: float  # A, rating of the LED
+    current: float  # A total
+    fuse_trip_current: float
+
+    @property
+    def bom_lines(self) -> int:
+        return len(self.bom)
+
+    @property
+    def parts(self) -> int:
+        return sum(line.quantity for line in self.bom)
+
+    @property
+    def over_led_rating(self) -> bool:
+        return self.led_current > self.led_max_current
+
+    @property
+    def over_fuse(self) -> bool:
+        return self.current > self.fuse_trip_current
+
+    @property
+    def price(self) -> float:
+        """
+        Sum of the known part prices. Ignores minimum order quantities and
+        price breaks.
+        """
+
+        return sum(line.price for line in self.bom if line.price is not None)
+
+    @property
+    def unpriced(self) -> list[str]:
+        return [line.part.partno for line in self.bom if line.price is None]
+
+
+# parts per LED cell and per card
+CELL_PARTS = [LED_RED, RESISTOR_100R]
+CARD_PARTS = [
+    (USB_C_RECEPTACLE_16P, 1),
+    (FUSE_1A, 1),
+    (RESISTOR_5K1, 2),
+    (CAPACITOR_100N, 1),
+]
+
+
+def load_prices(
+    build_dir: Path, parts_store: Path | None = None
+) -> dict[str, float | None]:
+    """
+    LCSC unit prices of the card's parts from the cached easyeda part data, or
+    from the parts store.
+    """
+
+    store = None
+    if parts_store is not None and parts_store.exists():
+        store = PartsStore(parts_store)
+
+    prices: dict[str, float | None] = {}
+    try:
+        for part in CELL_PARTS + [part for part, _ in CARD_PARTS]:
+            path = build_dir.joinpath(EASYEDA_CACHE, part.partno)
+            data = None
+            if path.exists():
+                data = json.loads(path.read_bytes())
+            elif store is not None:
+                data = store.easyeda_data(part.partno)
+
+            price = None
+            if data is not None:
+                price = data.get("lcsc", {}).get("price")
+            if price is None:
+                logger.warning(f"No price for {part.partno}")
+            prices[part.partno] = price
+    finally:
+        if store is not None:
+            store.close()
+    return prices
+
+
+def estimate(
+    led_text: str,
+    font: Font,
+    font_size: float = 20,
+    led_density: float = 0.13,
+    prices: dict[str, float | None] | None = None,
+    supply_voltage: float = SUPPLY_VOLTAGE,
+) -> Estimate:
+    # same layout PixelCard builds
+    led_count = len(
+        text_layout(
+            font=font,
+            text=led_text,
+            font_size=font_size,
+            density=led_density,
+            bbox=TEXT_BBOX,
+            scale_to_fit=False,
+        ).leds
+    )
+
+    prices = prices or {}
+    bom = [
+        BOMLine(part, quantity, prices.get(part.partno))
+        for part, quantity in [(p, led_count) for p in CELL_PARTS] + CARD_PARTS
+        if quantity
+    ]
+
+    led_current = max(
+        0.0,
+        (supply_voltage - LED_RED.params["forward_voltage"])
+        / RESISTOR_100R.params["resistance"],
+    )
+
+    return Estimate(
+        led_count=led_count,
+        bom=bom,
+        led_current=led_current,
+        led_max_current=LED_RED.params["max_current"],
+        current=led_current * led_count,
+        fuse_trip_current=FUSE_1A.params["trip_current"],
+    )
+
+
+def report(result: Estimate):
+    logger.info(f"LEDs:       {result.led_count}")
+    logger.info(f"BOM:        {result.bom_lines} lines, {result.parts} parts")
+    for line in result.bom:
+        price = "n/a" if line.price is None else f"${line.price:.4f}"
+        logger.info(
+            f"  {line.quantity:5d}x {line.part.partno:<9} {line.part.description:<32}"
+            f" {price}"
+        )
+    logger.info(
+        f"Current:    {result.current:.3f}A ({result.led_current * 1e3:.1f}mA/LED),"
+        f" fuse trips at {result.fuse_trip_current:.1f}A"
+    )
+    if result.over_led_rating:
+        logger.warning(
+            f"LED current exceeds the LED rating of"
+            f" {result.led_max_current * 1e3:.0f}mA"
+        )
+    if result.over_fuse:
+        logger.warning("Estimated current exceeds the fuse trip current")
+    missing = f" (no price for {', '.join(result.unpriced)})" if result.unpriced else ""
+    logger.info(f"Part cost:  ${result.price:.2f}{missing}")
@@ -0,0 +1,93 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Startup budget of a module, from `python -X importtime` in a fresh interpreter.
+
+> python -m pixelcard.importtime
+> python -m pixelcard.importtime pixelcard.pcb --top 30
+> python -m pixelcard.importtime --budget-ms 300
+"""
+
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+
+import typer
+
+# import time:   self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure(module: str) -> list[ImportTime]:
+    """
+    Import the module in a fresh interpreter and parse the importtime log.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        times.append(
+            ImportTime(
+                module=name,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=len(indent) // 2,
+            )
+        )
+    return times
+
+
+def main(
+    module: str = typer.Argument("pixelcard.main", help="Module to import"),
+    top: int = typer.Option(20, help="Number of slowest imports to list"),
+    budget_ms: float = typer.Option(
+        0, help="Fail if the import takes longer than this (0: no budget)"
+    ),
+):
+    times = measure(module)
+    total_ms = sum(t.self_us for t in times) / 1000
+
+    # top level packages, by their own share of the startup
+    packages: dict[str, int] = {}
+    for t in times:
+        package = t.module.split(".")[0]
+        packages[package] = packages.get(package, 0) + t.self_us
+
+    print(f"import {module}: {total_ms:.1f}ms, {len(times)} modules")
+
+    print("\nslowest imports (cumulative):")
+    for t in sorted(times, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        print(f"{t.cumulative_us / 1000:9.1f}ms {t.self_us / 1000:9.1f}ms  {t.module}")
+
+    print("\nby package (self):")
+    for package, us in sorted(packages.items(), key=lambda i: i[1], reverse=True)[:top]:
+        print(f"{us / 1000:9.1f}ms  {package}")
+
+    if budget_ms and total_ms > budget_ms:
+        print(f"\nimport {module} exceeds the budget of {budget_ms:.0f}ms")
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,154 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import logging
+from enum import Enum, auto
+
+from faebryk.core.core import ModuleInterface
+from faebryk.exporters.pcb.kicad.transformer import PCB_Transformer
+from faebryk.library.has_pcb_routing_strategy import has_pcb_routing_strategy
+from faebryk.libs.geometry.basic import Geometry
+from pixelcard.libs.spatial_routing import (
+    minimum_spanning_tree,
+    row_chain,
+    track_length,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class has_pcb_routing_strategy_spatial(has_pcb_routing_strategy.impl()):
+    """
+    Routes the internal nets of a node with many pads (e.g the power of an LED
+    array) as a minimum spanning tree or a row by row daisy chain, in
+    O(N log N) instead of pairwise.
+
+    nets: interface of the node that is part of the net -> topology. The tree
+        spans all pads of the net, also those outside of the node, so the net
+        needs no other routing strategy.
+    default: topology for the nets that stay inside the node, i.e none of the
+        interfaces of the node is part of them, e.g the LED to resistor net of
+        every cell of an LED array. None to leave them.
+    layer: layer of the default nets
+    layers: layer per net of nets, layer if not given. The tracks are
+        straight, so every net needs a layer of its own. Pads on another
+        layer get a via at via_offset from them.
+    """
+
+    class Topology(Enum):
+        MST = auto()
+        ROW_CHAIN = auto()
+
+    def __init__(
+        self,
+        nets: dict[ModuleInterface, Topology],
+        default: Topology | None = None,
+        layer: str = "F.Cu",
+        width: float = 0.2,
+        row_tolerance: float = 0.5,
+        layers: dict[ModuleInterface, str] | None = None,
+        via_offset: Geometry.Point2D = (0.8, 0.3),
+    ) -> None:
+        super().__init__()
+        self.nets = nets
+        self.default = default
+        self.layer = layer
+        self.width = width
+        self.row_tolerance = row_tolerance
+        self.layers = {mif: (layers or {}).get(mif, layer) for mif in nets}
+        self.via_offset = via_offset
+
+        used = [self.layers[mif] for mif in nets]
+        if default is not None:
+            used.append(layer)
+        if len(set(used)) != len(used):
+            raise ValueError(
+                f"Straight tracks of different nets on one layer short: {used}"
+            )
+
+    def _route(
+        self,
+        transformer: PCB_Transformer,
+        pads: dict,
+        topology: Topology,
+        layer: str,
+    ):
+        from faebryk.exporters.pcb.routing.util import DEFAULT_VIA_SIZE_DRILL, Path
+
+        layer_id = transformer.get_layer_id(layer)
+        path = Path()
+
+        # where the tracks of the net start, the pad or its via
+        ends = []
+        for pos in pads.values():
+            if pos[3] == layer_id:
+                ends.append((pos[0], pos[1]))
+                continue
+            via_pos = Geometry.add_points(pos, self.via_offset)
+            path.add(Path.Via(via_pos, size_drill=DEFAULT_VIA_SIZE_DRILL))
+            path.add(Path.Line(self.width, pos[3], pos, via_pos))
+            ends.append((via_pos[0], via_pos[1]))
+
+        if topology == self.Topology.MST:
+            edges = minimum_spanning_tree(ends)
+        else:
+            edges = row_chain(ends, self.row_tolerance)
+
+        logger.debug(
+            f"Routing net with {len(pads)} pads as {topology.name} on {layer}:"
+            f" {track_length(ends, edges):.1f}mm"
+        )
+
+        for a, b in edges:
+            path.add(Path.Track(self.width, layer, [ends[a], ends[b]]))
+        return path
+
+    def calculate(self, transformer: PCB_Transformer):
+        from faebryk.core.util import get_all_nodes
+        from faebryk.exporters.pcb.routing.util import (
+            Route,
+            get_internal_nets_of_node,
+            get_pads_pos_of_mifs,
+        )
+        from faebryk.library.Electrical import Electrical
+
+        node = self.get_obj()
+        nets = list(get_internal_nets_of_node(node).items())
+
+        routes = []
+        routed: set[int] = set()
+        for mif, topology in self.nets.items():
+            index = next((i for i, (_, mifs) in enumerate(nets) if mif in mifs), None)
+            if index is None:
+                logger.warning(f"{mif} is not a net of {node}, not routing it")
+                continue
+            routed.add(index)
+            net, mifs = nets[index]
+            # all pads of the net, not only those inside of node
+            if net is not None:
+                mifs = get_internal_nets_of_node(net)[net]
+            pads = get_pads_pos_of_mifs(mifs)
+            if len(pads) < 2:
+                continue
+            path = self._route(transformer, pads, topology, self.layers[mif])
+            routes.append(Route(pads=pads.keys(), path=path))
+
+        if self.default is None:
+            return routes
+
+        boundary = {
+            mif
+            for interface in node.IFs.get_all()
+            for mif in [interface, *get_all_nodes(interface)]
+            if isinstance(mif, Electrical)
+        }
+        for index, (_, mifs) in enumerate(nets):
+            if index in routed or not boundary.isdisjoint(mifs):
+                continue
+            pads = get_pads_pos_of_mifs(mifs)
+            if len(pads) < 2:
+                continue
+            path = self._route(transformer, pads, self.default, self.layer)
+            routes.append(Route(pads=pads.keys(), path=path))
+
+        return routes
@@ -0,0 +1,54 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Exclusive advisory lock on a file, across processes (e.g batch workers).
+flock on POSIX, msvcrt.locking on Windows.
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(fd: int):
+        # LK_LOCK only retries for 10s, keep waiting like flock does
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock(fd: int):
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Holds an exclusive lock on path (created if missing) for the duration of
+    the block.
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as f:
+        # msvcrt locks bytes from the current position
+        f.seek(0)
+        _lock(f.fileno())
+        try:
+            yield
+        finally:
+            f.seek(0)
+            _unlock(f.fileno())
@@ -0,0 +1,78 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import logging
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+from faebryk.libs.font import Font
+from shapely import wkb
+from shapely.geometry import Polygon
+
+logger = logging.getLogger(__name__)
+
+
+class CachedFont(Font):
+    """
+    Font that caches the result of string_to_polygons.
+
+    Results are kept in an in-memory LRU and, if cache_dir is given, on disk.
+    Keys include the hash of the font file, so a changed font never hits stale
+    geometry.
+    """
+
+    def __init__(self, ttf: Path, cache_dir: Path | None = None, maxsize: int = 64):
+        super().__init__(ttf)
+        self.digest = hashlib.sha256(ttf.read_bytes()).hexdigest()
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+        self._lru: OrderedDict[str, list[Polygon]] = OrderedDict()
+
+    def _key(self, string: str, font_size: float, **kwargs) -> str:
+        key = repr((self.digest, string, font_size, sorted(kwargs.items())))
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _load(self, key: str) -> list[Polygon] | None:
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir.joinpath(f"{key}.pickle")
+        if not path.exists():
+            return None
+        try:
+            return [wkb.loads(data) for data in pickle.loads(path.read_bytes())]
+        except Exception:
+            logger.warning(f"Ignoring corrupt polygon cache entry {path}")
+            return None
+
+    def _store(self, key: str, polygons: list[Polygon]):
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir.joinpath(f"{key}.pickle")
+        # write & rename, so concurrent batch workers never read partial files
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps([wkb.dumps(p) for p in polygons]))
+        tmp.replace(path)
+
+    def string_to_polygons(
+        self, string: str, font_size: float, **kwargs
+    ) -> list[Polygon]:
+        key = self._key(string, font_size, **kwargs)
+
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return list(self._lru[key])
+
+        polygons = self._load(key)
+        if polygons is None:
+            polygons = super().string_to_polygons(string, font_size, **kwargs)
+            self._store(key, polygons)
+
+        self._lru[key] = polygons
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+        return list(polygons)
@@ -0,0 +1,219 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Font acquisition: local copies first, then a streamed and verified download.
+
+Fonts end up content-addressed in the cache as <sha256>/<file name>. The file
+name is kept, because KiCad uses its stem as the font face.
+
+Sources are tried in order:
+    1. the cache, the slot of the pinned sha256 or, for unpinned fonts, the
+       most recent intact slot of the file name
+    2. the legacy cache location <cache>/<file name>, moved into its slot
+    3. mirror directories ($PIXELCARD_FONT_MIRROR) holding either the ttf
+       itself or a zip containing it
+    4. the download url
+
+Every font is checked against its pinned sha256, a source with another hash is
+skipped. Unpinned fonts are used as found locally, but only downloaded if
+$PIXELCARD_FONT_ALLOW_UNPINNED is set.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from pixelcard.libs.filelock import file_lock
+
+logger = logging.getLogger(__name__)
+
+MIRROR_ENV = "PIXELCARD_FONT_MIRROR"
+ALLOW_UNPINNED_ENV = "PIXELCARD_FONT_ALLOW_UNPINNED"
+
+
+class FontError(Exception): ...
+
+
+@dataclass(frozen=True)
+class FontSource:
+    name: str  # ttf file name, also its name inside the zip
+    url: str  # zip download
+    sha256: str | None = None  # of the ttf
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FontProvider:
+    def __init__(
+        self,
+        cache_dir: Path,
+        mirrors: list[Path] | None = None,
+        timeout: float = 30,
+        retries: int = 3,
+        allow_unpinned: bool = False,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.mirrors = mirrors or []
+        self.timeout = timeout
+        self.retries = retries
+        self.allow_unpinned = allow_unpinned
+
+    @classmethod
+    def default(cls, cache_dir: Path) -> "FontProvider":
+        mirrors = [Path(p) for p in os.environ.get(MIRROR_ENV, "").split(os.pathsep)]
+        return cls(
+            cache_dir,
+            [p for p in mirrors if p.name],
+            allow_unpinned=bool(os.environ.get(ALLOW_UNPINNED_ENV)),
+        )
+
+    # sources ---------------------------------------------------------------
+    # candidate ttfs, with whether they may be moved into the cache
+
+    def _legacy(self, source: FontSource) -> Iterator[tuple[Path, bool]]:
+        # where fonts were cached before they were content-addressed
+        ttf = self.cache_dir.joinpath(source.name)
+        if ttf.is_file():
+            logger.info(f"Font {source.name} from legacy cache {ttf}")
+            yield ttf, True
+
+    def _from_mirrors(
+        self, source: FontSource, tmp_dir: Path
+    ) -> Iterator[tuple[Path, bool]]:
+        for mirror in self.mirrors:
+            if not mirror.is_dir():
+                continue
+            ttf = mirror.joinpath(source.name)
+            if ttf.is_file():
+                logger.info(f"Font {source.name} from mirror {mirror}")
+                yield ttf, False
+            for archive in sorted(mirror.glob("*.zip")):
+                try:
+                    with zipfile.ZipFile(archive) as zip_ref:
+                        if source.name not in zip_ref.namelist():
+                            continue
+                        extracted = Path(zip_ref.extract(source.name, tmp_dir))
+                except zipfile.BadZipFile:
+                    logger.warning(f"Skipping corrupt font mirror {archive}")
+                    continue
+                logger.info(f"Font {source.name} from mirror {archive}")
+                yield extracted, True
+
+    def _download(
+        self, source: FontSource, tmp_dir: Path
+    ) -> Iterator[tuple[Path, bool]]:
+        import requests
+
+        archive = tmp_dir.joinpath("download.zip")
+        for attempt in range(1, self.retries + 1):
+            try:
+                logger.info(f"Downloading font {source.name} from {source.url}")
+                with requests.get(source.url, stream=True, timeout=self.timeout) as r:
+                    r.raise_for_status()
+                    with archive.open("wb") as f:
+                        for chunk in r.iter_content(chunk_size=1 << 16):
+                            f.write(chunk)
+                with zipfile.ZipFile(archive) as zip_ref:
+                    extracted = Path(zip_ref.extract(source.name, tmp_dir))
+            except (requests.RequestException, zipfile.BadZipFile, KeyError) as e:
+                # KeyError: the archive does not contain the font
+                archive.unlink(missing_ok=True)
+                if attempt == self.retries:
+                    raise FontError(
+                        f"Could not download font {source.name} from {source.url}"
+                        f" and no mirror has it (set {MIRROR_ENV}): {e!r}"
+                    ) from e
+                logger.warning(f"Font download failed ({e!r}), retrying")
+                time.sleep(2**attempt)
+                continue
+            yield extracted, True
+            return
+
+    def _candidates(
+        self, source: FontSource, tmp_dir: Path
+    ) -> Iterator[tuple[Path, bool]]:
+        yield from self._legacy(source)
+        yield from self._from_mirrors(source, tmp_dir)
+        if source.sha256 is None and not self.allow_unpinned:
+            raise FontError(
+                f"Font {source.name} has no pinned sha256 and no local copy. Pin"
+                f" it, provide a mirror ({MIRROR_ENV}), or set"
+                f" {ALLOW_UNPINNED_ENV}=1 to download it unverified."
+            )
+        yield from self._download(source, tmp_dir)
+
+    def _cached(self, source: FontSource) -> Path | None:
+        if source.sha256 is not None:
+            slots = [self.cache_dir.joinpath(source.sha256, source.name)]
+        else:
+            slots = sorted(
+                (p for p in self.cache_dir.glob(f"*/{source.name}") if p.is_file()),
+                key=lambda p: p.stat().st_mtime_ns,
+                reverse=True,
+            )
+        # the directory name is the sha256, which also skips temporary dirs
+        return next(
+            (p for p in slots if p.is_file() and _sha256(p) == p.parent.name), None
+        )
+
+    def _verify(self, source: FontSource, ttf: Path) -> str | None:
+        """
+        sha256 of ttf if it may be used as source, None if not.
+        """
+
+        sha256 = _sha256(ttf)
+        if source.sha256 is None:
+            logger.warning(
+                f"Font {source.name} is not pinned, using it unverified"
+                f" (sha256 {sha256})"
+            )
+            return sha256
+        if sha256 != source.sha256:
+            logger.warning(f"Skipping {ttf}: sha256 {sha256}, expected {source.sha256}")
+            return None
+        return sha256
+
+    # api -------------------------------------------------------------------
+    def get(self, source: FontSource) -> Path:
+        """
+        Path of the verified ttf in the cache, acquiring it if necessary.
+        """
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # serializes acquisition across processes (e.g batch workers), so a
+        # font is downloaded once
+        with file_lock(self.cache_dir.joinpath(f".{source.name}.lock")):
+            if (cached := self._cached(source)) is not None:
+                return cached
+
+            tmp_dir = self.cache_dir.joinpath(f".{source.name}.{os.getpid()}.tmp")
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                for ttf, movable in self._candidates(source, tmp_dir):
+                    sha256 = self._verify(source, ttf)
+                    if sha256 is None:
+                        continue
+                    cached = self.cache_dir.joinpath(sha256, source.name)
+                    cached.parent.mkdir(parents=True, exist_ok=True)
+                    if movable:
+                        ttf.replace(cached)
+                    else:
+                        shutil.copyfile(ttf, cached)
+                    return cached
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        raise FontError(f"No source of font {source.name} has sha256 {source.sha256}")
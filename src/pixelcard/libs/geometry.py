@@ -0,0 +1,56 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Post-processing of the text geometry before it becomes silkscreen zones.
+"""
+
+import numpy as np
+from shapely.geometry import MultiPolygon, Polygon
+from shapely.geometry.polygon import orient
+from shapely.ops import unary_union
+
+Point2D = tuple[float, float]
+
+
+def merge_polygons(polygons: list[Polygon], tolerance: float) -> list[Polygon]:
+    """
+    Merge touching/overlapping polygons and drop vertices that deviate less
+    than tolerance (mm) from the outline. Topology (holes) is kept.
+    """
+
+    if not polygons:
+        return []
+
+    merged = unary_union(polygons).simplify(tolerance, preserve_topology=True)
+    parts = merged.geoms if isinstance(merged, MultiPolygon) else [merged]
+
+    # exteriors counter-clockwise, holes clockwise
+    return [orient(p) for p in parts if isinstance(p, Polygon) and not p.is_empty]
+
+
+def fracture(polygon: Polygon) -> list[Point2D]:
+    """
+    Single ring outline of a polygon with holes.
+
+    Every hole is spliced into the outline with a zero width slit between the
+    closest pair of vertices, like KiCad does when filling zones. The result
+    encloses exactly the area of the polygon.
+    """
+
+    ring = list(polygon.exterior.coords)[:-1]
+
+    # left to right, so slits run to the outline or a hole spliced in before
+    for hole in sorted(polygon.interiors, key=lambda h: h.bounds[0]):
+        hole_ring = list(hole.coords)[:-1]
+
+        outline = np.asarray(ring)
+        hole_points = np.asarray(hole_ring)
+        distances = np.linalg.norm(
+            outline[:, None, :] - hole_points[None, :, :], axis=2
+        )
+        i, j = np.unravel_index(np.argmin(distances), distances.shape)
+
+        ring = ring[: i + 1] + hole_ring[j:] + hole_ring[: j + 1] + ring[i:]
+
+    return ring
@@ -0,0 +1,300 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+LED layout of a text, composed from cached glyphs.
+
+faebryk renders a text with Font.string_to_polygons and FontLayout fills every
+polygon of it on its own with get_distributed_points_in_polygon. Both are
+rebuilt here from per-glyph parts, so the cost of a text depends on the glyphs
+it has not seen before rather than on its length:
+
+- The outline of every character is read from the font and flattened once,
+  together with its advance (string_to_polygons does not kern). A text is
+  composed from these exactly the way string_to_polygons places, scales and
+  flips the characters, down to the order of the polygons.
+- The LED positions of every polygon of a glyph are drawn once per scale and
+  density, relative to the bounds of the polygon, and moved to every place
+  the polygon appears at.
+
+FontLayout's positions are random (unseeded start points, then relaxed), so
+no two layouts are equal. The composed ones are drawn by the same function
+from the same polygons: the count is FontLayout's and the positions are
+distributed the same way, see benchmarks/fontlayout_check.py.
+
+The caches are process wide, shared by all texts laid out with the same font
+(e.g all cards of a batch worker).
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+import freetype
+from faebryk.libs.font import Font
+from faebryk.libs.geometry.basic import (
+    get_distributed_points_in_polygon,
+    polygon_insert_cutout,
+    transform_polygon,
+)
+from shapely import transform
+from shapely.geometry import Polygon
+
+logger = logging.getLogger(__name__)
+
+Point2D = tuple[float, float]
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    polygons: list[Polygon]
+    leds: list[Point2D]
+
+
+@dataclass
+class Glyph:
+    """
+    Outline of a character in font units, with the pen at the origin.
+
+    contours: as read from the font, before flattening
+    polygons: flattened, each with the pass of flatten_polygons that emits it
+    """
+
+    advance: int
+    contours: list[Polygon]
+    polygons: list[tuple[int, Polygon]]
+
+
+def flatten_glyph(contours: list[Polygon]) -> list[tuple[int, Polygon]]:
+    """
+    faebryk's flatten_polygons, which also returns the pass every polygon is
+    emitted in. Flattening a text emits the polygons of a pass for all glyphs
+    before the next pass, so a text orders its polygons by (pass, glyph).
+    """
+
+    flattened: list[tuple[int, Polygon]] = []
+    polygons = contours
+    level = 0
+    while polygons:
+        remaining = []
+        for poly in polygons:
+            if any([p.contains(poly) for p in polygons if p != poly]):
+                remaining.append(poly)
+                continue
+            if any([z.contains(poly) for _, z in flattened]):
+                flattened = [
+                    (lvl, polygon_insert_cutout(z, poly) if z.contains(poly) else z)
+                    for lvl, z in flattened
+                ]
+            else:
+                flattened.append((level, poly))
+        polygons = remaining
+        level += 1
+
+    return flattened
+
+
+def _translate(polygon: Polygon, dx: float, dy: float) -> Polygon:
+    # plain addition, the same float operation string_to_polygons places with
+    return transform(polygon, lambda coords: coords + (dx, dy))
+
+
+def _bounds_within(inner: tuple, outer: tuple) -> bool:
+    return (
+        outer[0] <= inner[0]
+        and outer[1] <= inner[1]
+        and inner[2] <= outer[2]
+        and inner[3] <= outer[3]
+    )
+
+
+class GlyphCache:
+    """
+    Glyphs of one font and the LED positions of their polygons.
+    """
+
+    def __init__(self, font: Font) -> None:
+        self.font = font
+        self._face: freetype.Face | None = None
+        self._glyphs: dict[str, Glyph] = {}
+        # (char, polygon index, scale, density) -> LED positions relative to
+        # the lower bounds of the polygon
+        self._leds: dict[tuple, list[Point2D]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def face(self) -> freetype.Face:
+        if self._face is None:
+            self._face = freetype.Face(str(self.font.path))
+        return self._face
+
+    def glyph(self, char: str) -> Glyph:
+        if char in self._glyphs:
+            return self._glyphs[char]
+
+        face = self.face
+        face.load_char(char)
+        points = face.glyph.outline.points
+        contours = []
+        start = 0
+        for end in face.glyph.outline.contours:
+            contour = [tuple(map(float, p)) for p in points[start : end + 1]]
+            contours.append(Polygon([*contour, contour[0]]))
+            start = end + 1
+
+        glyph = Glyph(face.glyph.advance.x, contours, flatten_glyph(contours))
+        self._glyphs[char] = glyph
+        return glyph
+
+    def polygons(
+        self,
+        text: str,
+        font_size: float,
+        bbox: tuple[float, float] | None,
+        scale_to_fit: bool,
+    ) -> list[tuple[tuple, Polygon]] | None:
+        """
+        font.string_to_polygons(text, ...) composed from the glyphs, each
+        polygon with a key of the glyph polygon and the scale it is made from.
+        None if the glyphs can not be composed: an empty text, or a contour of
+        one glyph inside one of another.
+        """
+
+        if scale_to_fit:
+            font_size = 1
+        scale = font_size / self.face.units_per_EM
+
+        # pen positions, same line break as string_to_polygons without wrap
+        placed: list[tuple[str, float, Glyph]] = []
+        offset_x = 0.0
+        for char in text:
+            glyph = self.glyph(char)
+            if bbox and not scale_to_fit:
+                if offset_x + glyph.advance > bbox[0] / scale:
+                    break
+            placed.append((char, offset_x, glyph))
+            offset_x += glyph.advance
+
+        bounds = [
+            (n, (b[0] + x, b[1], b[2] + x, b[3]))
+            for n, (_, x, glyph) in enumerate(placed)
+            for b in (contour.bounds for contour in glyph.contours)
+        ]
+        if not bounds:
+            return None
+        min_x = min(b[0] for _, b in bounds)
+        min_y = min(b[1] for _, b in bounds)
+        max_x = max(b[2] for _, b in bounds)
+        max_y = max(b[3] for _, b in bounds)
+
+        # flattening a text compares the contours of all glyphs, composing is
+        # only the same if no contour can be inside one of another glyph
+        bounds.sort(key=lambda item: item[1][0])
+        for i, (n, outer) in enumerate(bounds):
+            for m, inner in bounds[i + 1 :]:
+                if inner[0] > outer[2]:
+                    break
+                if n != m and (
+                    _bounds_within(inner, outer) or _bounds_within(outer, inner)
+                ):
+                    return None
+
+        if scale_to_fit and bbox:
+            scale = min(bbox[0] / (max_x - min_x), bbox[1] / (max_y - min_y))
+
+        ordered = sorted(
+            (level, n, k, char, x, polygon)
+            for n, (char, x, glyph) in enumerate(placed)
+            for k, (level, polygon) in enumerate(glyph.polygons)
+        )
+        polygons = [
+            (
+                (char, k, scale),
+                transform_polygon(
+                    _translate(polygon, x, 0.0), scale=scale, offset=(-min_x, -min_y)
+                ),
+            )
+            for _, _, k, char, x, polygon in ordered
+        ]
+
+        # Invert the y-axis
+        top = max(p.bounds[3] for _, p in polygons)
+        return [
+            (key, Polygon([(p[0], -p[1] + top) for p in polygon.exterior.coords]))
+            for key, polygon in polygons
+        ]
+
+    def leds(self, key: tuple, polygon: Polygon, density: float) -> list[Point2D]:
+        """
+        get_distributed_points_in_polygon(polygon, density), drawn once per
+        key and moved to the bounds of polygon.
+        """
+
+        x0, y0 = polygon.bounds[:2]
+        count = int(polygon.area * density)
+        if polygon.area > 0 and count == 0:
+            count = 1
+
+        cached = self._leds.get(key)
+        # the area of a moved polygon may round to another count
+        if cached is not None and len(cached) == count:
+            self.hits += 1
+        else:
+            self.misses += 1
+            points = get_distributed_points_in_polygon(polygon=polygon, density=density)
+            cached = [(p.x - x0, p.y - y0) for p in points]
+            self._leds[key] = cached
+
+        return [(x + x0, y + y0) for x, y in cached]
+
+
+_caches: dict[Path, GlyphCache] = {}
+
+
+def get_glyph_cache(font: Font) -> GlyphCache:
+    """
+    Process wide GlyphCache of font, shared by all cards built with it (e.g
+    all cards of a batch worker).
+    """
+
+    key = Path(font.path).resolve()
+    if key not in _caches:
+        _caches[key] = GlyphCache(font)
+    return _caches[key]
+
+
+def text_layout(
+    font: Font,
+    text: str,
+    font_size: float,
+    density: float,
+    bbox: tuple[float, float] | None = None,
+    scale_to_fit: bool = False,
+) -> TextLayout:
+    """
+    Silkscreen polygons of a text, equal to font.string_to_polygons, and its
+    LED positions, drawn like FontLayout's with the same arguments.
+    """
+
+    cache = get_glyph_cache(font)
+    composed = cache.polygons(text, font_size, bbox, scale_to_fit)
+
+    if composed is None:
+        logger.info(f"Can not compose {text!r} from glyphs, rendering it whole")
+        polygons = font.string_to_polygons(
+            text, font_size, bbox=bbox, scale_to_fit=scale_to_fit
+        )
+        leds = [
+            (p.x, p.y)
+            for polygon in polygons
+            for p in get_distributed_points_in_polygon(polygon=polygon, density=density)
+        ]
+        return TextLayout(polygons, leds)
+
+    leds = [
+        led
+        for key, polygon in composed
+        for led in cache.leds((*key, density), polygon, density)
+    ]
+    return TextLayout([polygon for _, polygon in composed], leds)
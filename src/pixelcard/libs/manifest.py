@@ -0,0 +1,84 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Manifest of the pipeline stages of the last run.
+
+For every stage it records a fingerprint of the stage inputs and the digests
+of the files the stage produced. A stage can be skipped if its inputs did not
+change and its outputs are still exactly what it left behind.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*inputs) -> str:
+    data = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def file_digest(path: Path) -> str | None:
+    """
+    Digest of a file, or of all files below a directory. None if missing.
+    """
+
+    if path.is_file():
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    if path.is_dir():
+        files = sorted(p for p in path.rglob("*") if p.is_file())
+        return fingerprint(*((p.relative_to(path), file_digest(p)) for p in files))
+    return None
+
+
+def source_digest(root: Path) -> str:
+    """
+    Digest of all python sources below root, so code changes invalidate stages.
+    """
+
+    return fingerprint(
+        *((p.relative_to(root), file_digest(p)) for p in sorted(root.rglob("*.py")))
+    )
+
+
+class StageManifest:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.stages: dict[str, dict] = {}
+        if path.exists():
+            try:
+                self.stages = json.loads(path.read_text())
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring corrupt stage manifest {path}")
+
+    def outputs_intact(self, stage: str) -> bool:
+        entry = self.stages.get(stage)
+        if entry is None:
+            return False
+        return all(
+            file_digest(Path(path)) == digest
+            for path, digest in entry["outputs"].items()
+        )
+
+    def is_fresh(self, stage: str, inputs: str) -> bool:
+        entry = self.stages.get(stage)
+        if entry is None or entry["inputs"] != inputs:
+            return False
+        return self.outputs_intact(stage)
+
+    def record(self, stage: str, inputs: str, outputs: list[Path]):
+        self.stages[stage] = {
+            "inputs": inputs,
+            "outputs": {str(path): file_digest(path) for path in outputs},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.stages, indent=4))
+
+    def invalidate(self, *stages: str):
+        for stage in stages:
+            self.stages.pop(stage, None)
+        self.path.write_text(json.dumps(self.stages, indent=4))
@@ -0,0 +1,88 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Type and trait index over the node tree of an app.
+
+get_all_nodes + isinstance/has_trait scans are linear per query, so PCB
+scripting that issues one per step ends up quadratic in the LED count. The
+index walks the tree once; lookups by type are dict hits and lookups by trait
+scan the nodes once per trait type.
+"""
+
+from collections import defaultdict
+from typing import TypeVar
+
+from faebryk.core.core import Node, Trait
+from faebryk.core.util import get_all_nodes, get_node_direct_children
+
+T = TypeVar("T", bound=Node)
+
+
+class NodeIndex:
+    """
+    Snapshot of the tree below root. Nodes added afterwards are not indexed,
+    trait lookups reflect the traits at the time of the first query.
+    """
+
+    def __init__(self, root: Node) -> None:
+        self.root = root
+        # root first, then in traversal order
+        self.nodes: list[Node] = [root, *get_all_nodes(root)]
+
+        # concrete type -> positions in nodes, base types are resolved on lookup
+        self._by_type: dict[type[Node], list[int]] = defaultdict(list)
+        for i, node in enumerate(self.nodes):
+            self._by_type[type(node)].append(i)
+
+        self._by_trait: dict[type[Trait], list[Node]] = {}
+
+        # child positions from root, orders nodes like get_node_tree does
+        self._paths: dict[Node, tuple[int, ...]] = {root: ()}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            path = self._paths[node]
+            for i, child in enumerate(get_node_direct_children(node)):
+                self._paths[child] = (*path, i)
+                stack.append(child)
+
+    def of_type(self, t: type[T]) -> list[T]:
+        """
+        All nodes that are instances of t, in traversal order.
+        """
+
+        positions = [
+            i
+            for node_type, type_positions in self._by_type.items()
+            if issubclass(node_type, t)
+            for i in type_positions
+        ]
+        return [self.nodes[i] for i in sorted(positions)]  # type: ignore
+
+    def with_trait(self, trait: type[Trait]) -> list[Node]:
+        if trait not in self._by_trait:
+            self._by_trait[trait] = [n for n in self.nodes if n.has_trait(trait)]
+        return list(self._by_trait[trait])
+
+    def first_of_type(self, t: type[T], within: Node | None = None) -> T:
+        """
+        Same node as get_first_child_of_type(within or root, t): the shallowest
+        instance of t in the tree of it (itself included), the first in
+        get_node_tree order among equally deep ones. Raises ValueError like it
+        if there is none.
+        """
+
+        root = within or self.root
+        if root not in self._paths:
+            raise ValueError(f"{root} is not indexed")
+        prefix = self._paths[root]
+        candidates = [
+            node
+            for node in self.of_type(t)
+            if self._paths[node][: len(prefix)] == prefix
+        ]
+        if not candidates:
+            raise ValueError(f"No {t.__name__} below {root}")
+        # by depth, then level order of get_node_tree, i.e by child positions
+        return min(candidates, key=lambda n: (len(self._paths[n]), self._paths[n]))
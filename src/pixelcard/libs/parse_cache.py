@@ -0,0 +1,126 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from pixelcard.libs.filelock import file_lock
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ParseCache:
+    """
+    Disk cache of parsed files, e.g the s-expression tree of a kicad_pcb.
+
+    Entries are keyed by the hash of the file content, so copies of the same
+    board share one entry and an edited file never hits a stale tree. The
+    (mtime, size) of every loaded path is remembered with its hash, so an
+    untouched file is not even read before its tree is unpickled.
+
+    A file that is generated from a tree (e.g the board dumped by a build) is
+    stored with that tree, so the next load of it hits without parsing.
+
+    name: identifies the parser, change it when the parsed format changes
+    max_entries: entries kept at most, the least recently used are evicted
+    """
+
+    def __init__(self, cache_dir: Path, name: str, max_entries: int = 16) -> None:
+        self.cache_dir = cache_dir.joinpath(name)
+        self.stamps_path = self.cache_dir.joinpath("stamps.json")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _stamps(self) -> dict[str, list]:
+        try:
+            return json.loads(self.stamps_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, path: Path, data: bytes):
+        # write & rename, so concurrent batch workers never read partial files
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+    def digest(self, path: Path) -> str:
+        stat = path.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        key = str(path.resolve())
+
+        stamps = self._stamps()
+        if key in stamps and stamps[key][:2] == stamp:
+            return stamps[key][2]
+
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        # read again under the lock, concurrent workers add their own paths
+        with file_lock(self.stamps_path.with_suffix(".lock")):
+            stamps = self._stamps()
+            stamps[key] = [*stamp, digest]
+            self._write(self.stamps_path, json.dumps(stamps).encode())
+        return digest
+
+    def _entry(self, digest: str) -> Path:
+        return self.cache_dir.joinpath(f"{digest}.pickle")
+
+    def _used(self, entry: Path):
+        # the mtime orders entries by use, see _evict. Set explicitly, file
+        # timestamps only have the resolution of the kernel clock tick.
+        now = time.time_ns()
+        os.utime(entry, ns=(now, now))
+
+    def _evict(self):
+        entries = sorted(
+            self.cache_dir.glob("*.pickle"), key=lambda p: p.stat().st_mtime_ns
+        )
+        for entry in entries[: max(0, len(entries) - self.max_entries)]:
+            entry.unlink(missing_ok=True)
+
+        # stamps of evicted entries and of deleted files are of no use
+        with file_lock(self.stamps_path.with_suffix(".lock")):
+            stamps = self._stamps()
+            kept = {
+                key: stamp
+                for key, stamp in stamps.items()
+                if self._entry(stamp[2]).exists() and Path(key).exists()
+            }
+            if kept != stamps:
+                self._write(self.stamps_path, json.dumps(kept).encode())
+
+    def store(self, path: Path, result: object):
+        """
+        Remember result as the parsed content of path, e.g after writing path
+        from it.
+        """
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(self.digest(path))
+        self._write(entry, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        self._used(entry)
+        self._evict()
+
+    def load(self, path: Path, parse: Callable[[str], T]) -> T:
+        entry = self._entry(self.digest(path))
+
+        if entry.exists():
+            try:
+                result = pickle.loads(entry.read_bytes())
+                self.hits += 1
+                self._used(entry)
+                return result
+            except Exception:
+                logger.warning(f"Ignoring corrupt parse cache entry {entry}")
+
+        self.misses += 1
+        result = parse(path.read_text())
+        self.store(path, result)
+        return result
@@ -0,0 +1,258 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Single file, indexed store of the LCSC part data faebryk normally keeps
+scattered over build/cache/easyeda and libs/.
+
+Layout:
+    MAGIC | u64 index length | index (json) | blobs
+
+The index maps a part number to the files of that part (easyeda data,
+footprint, 3d models) as (root, relative path, offset, length). Blobs are
+deduplicated by content, so parts sharing a footprint store it once.
+The file is memory-mapped and a part's files are only read when they are
+needed. Builds are served from memory, see PartsStore.install. The files are
+only written out on request, with `parts import`.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import re
+import struct
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PXPARTS1"
+_HEADER = struct.Struct("<8sQ")
+
+EASYEDA_CACHE = Path("cache/easyeda")
+FOOTPRINTS = Path("footprints/lcsc.pretty")
+MODELS = Path("3dmodels/lcsc.3dshapes")
+
+# what install needs from faebryk.libs.picker.lcsc
+_LCSC_API = [
+    "download_easyeda_info",
+    "EasyedaFootprintImporter",
+    "Easyeda3dModelImporter",
+    "EasyedaSymbolImporter",
+    "ExporterFootprintKicad",
+    "Exporter3dModelKicad",
+]
+
+
+@dataclass(frozen=True)
+class PartFile:
+    root: str  # "build" or "libs"
+    path: str
+    offset: int
+    length: int
+
+
+def _part_files(partno: str, build_folder: Path, lib_folder: Path):
+    """
+    Yield (root, relative path) of all files faebryk needs for a part.
+    """
+
+    easyeda = EASYEDA_CACHE.joinpath(partno)
+    yield "build", easyeda
+
+    data = json.loads(build_folder.joinpath(easyeda).read_text())
+    footprint = FOOTPRINTS.joinpath(data["packageDetail"]["title"] + ".kicad_mod")
+    if not lib_folder.joinpath(footprint).exists():
+        return
+    yield "libs", footprint
+
+    for model in re.findall(
+        r'\(model "[^"]*/([^"/]+)\.\w+"', lib_folder.joinpath(footprint).read_text()
+    ):
+        for suffix in [".wrl", ".step"]:
+            path = MODELS.joinpath(model + suffix)
+            if lib_folder.joinpath(path).exists():
+                yield "libs", path
+
+
+def pack_parts(
+    out: Path,
+    build_folder: Path,
+    lib_folder: Path,
+    partnos: list[str] | None = None,
+) -> int:
+    """
+    Pack the locally cached parts (all, or the given part numbers) into a
+    store file. Returns the number of packed parts.
+    """
+
+    if partnos is None:
+        partnos = sorted(
+            p.name
+            for p in build_folder.joinpath(EASYEDA_CACHE).iterdir()
+            if p.is_file()
+        )
+
+    blobs: list[bytes] = []
+    blob_offsets: dict[str, tuple[int, int]] = {}
+    index: dict[str, list[tuple[str, str, int, int]]] = {}
+    offset = 0
+
+    for partno in partnos:
+        files = []
+        for root, path in _part_files(partno, build_folder, lib_folder):
+            folder = build_folder if root == "build" else lib_folder
+            data = folder.joinpath(path).read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if digest not in blob_offsets:
+                blob_offsets[digest] = (offset, len(data))
+                blobs.append(data)
+                offset += len(data)
+            files.append((root, path.as_posix(), *blob_offsets[digest]))
+        index[partno] = files
+
+    index_data = json.dumps({"version": 1, "parts": index}).encode()
+
+    tmp = out.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(index_data)))
+        f.write(index_data)
+        for blob in blobs:
+            f.write(blob)
+    tmp.replace(out)
+
+    return len(index)
+
+
+class PartsStore:
+    """
+    Read access to a store file. Close it (or use it as a context manager)
+    when done, unless it is installed into the picker.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+        magic, index_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a parts store")
+
+        self._data_start = _HEADER.size + index_length
+        index = json.loads(self._mmap[_HEADER.size : self._data_start])
+        self.parts: dict[str, list[PartFile]] = {
+            partno: [PartFile(*f) for f in files]
+            for partno, files in index["parts"].items()
+        }
+        self._easyeda: dict[str, dict] = {}
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "PartsStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, partno: str) -> bool:
+        return partno in self.parts
+
+    def read(self, file: PartFile) -> bytes:
+        start = self._data_start + file.offset
+        return self._mmap[start : start + file.length]
+
+    def easyeda_data(self, partno: str) -> dict | None:
+        """
+        The easyeda data of a part, None if the part is not in the store.
+        """
+
+        if partno not in self.parts:
+            return None
+        if partno not in self._easyeda:
+            file = next(f for f in self.parts[partno] if f.root == "build")
+            self._easyeda[partno] = json.loads(self.read(file))
+        return self._easyeda[partno]
+
+    def in_libs(self, partno: str, lib_folder: Path) -> bool:
+        """
+        Whether the footprint and models of a part are already in lib_folder.
+        """
+
+        files = [f for f in self.parts.get(partno, []) if f.root == "libs"]
+        return bool(files) and all(lib_folder.joinpath(f.path).exists() for f in files)
+
+    def materialize(self, partno: str, build_folder: Path, lib_folder: Path) -> bool:
+        """
+        Write the files of a part to where faebryk's LCSC picker expects them.
+        Returns False if the part is not in the store.
+        """
+
+        if partno not in self.parts:
+            return False
+
+        for file in self.parts[partno]:
+            folder = build_folder if file.root == "build" else lib_folder
+            target = folder.joinpath(file.path)
+            if target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(self.read(file))
+
+        return True
+
+    def install(self, lcsc: ModuleType):
+        """
+        Serve the parts of this store to faebryk's LCSC picker from memory,
+        before it looks at its caches or the network. Nothing is written:
+        the footprint and models of a part have to be in lcsc.LIB_FOLDER
+        already (they are in the repo's libs), parts without them go through
+        faebryk's download_easyeda_info, which exports them.
+
+        The store has to stay open as long as the picker is used.
+        """
+
+        for name in _LCSC_API:
+            assert hasattr(
+                lcsc, name
+            ), f"faebryk's lcsc picker has no {name}, can not install {self.path}"
+
+        download = lcsc.download_easyeda_info
+        download = getattr(download, "__wrapped__", download)
+
+        @wraps(download)
+        def download_easyeda_info_from_store(partno: str, get_model: bool = True):
+            data = self.easyeda_data(partno)
+            if data is None or not self.in_libs(partno, lcsc.LIB_FOLDER):
+                logger.debug(f"{partno} not served from parts store {self.path}")
+                return download(partno, get_model=get_model)
+
+            # same objects download_easyeda_info builds from its cache file
+            easyeda_footprint = lcsc.EasyedaFootprintImporter(
+                easyeda_cp_cad_data=data
+            ).get_footprint()
+            easyeda_model = lcsc.Easyeda3dModelImporter(
+                easyeda_cp_cad_data=data, download_raw_3d_model=False
+            ).output
+            easyeda_symbol = lcsc.EasyedaSymbolImporter(
+                easyeda_cp_cad_data=data
+            ).get_symbol()
+            return (
+                lcsc.ExporterFootprintKicad(easyeda_footprint),
+                lcsc.Exporter3dModelKicad(easyeda_model) if easyeda_model else None,
+                easyeda_footprint,
+                easyeda_model,
+                easyeda_symbol,
+            )
+
+        lcsc.download_easyeda_info = download_easyeda_info_from_store
@@ -0,0 +1,204 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Patch a kicad_pcb with a newly generated version of it, item by item.
+
+Top-level items (footprints, zones, tracks, nets, ...) of both files are
+matched, first by content, then by identity:
+- footprints by reference
+- zones by name and layer
+- nets by number
+- header sections (setup, layers, ...) by their type
+- everything else by uuid
+
+Matched items whose content did not change keep their exact bytes, including
+the formatting KiCad gave them. Only changed, added and removed items touch
+the text, so the file stays stable across runs and the git diff shows what
+actually changed on the board.
+"""
+
+import logging
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Hashable
+
+from pixelcard.libs.sexp import iter_items
+
+logger = logging.getLogger(__name__)
+
+_HEAD = re.compile(r'\(\s*([^\s()"]+)')
+_UUID = re.compile(r'\((?:uuid|tstamp)\s+"?[^\s)"]*"?\s*\)')
+_NUMBER = re.compile(r"(?<=[\s(])-?\d+(?:\.\d+)?(?=[\s)])")
+_STRING = r'"(?:[^"\\]|\\.)*"'
+_REFERENCE = re.compile(
+    rf'^\((?:property\s+"Reference"|fp_text\s+reference)\s+({_STRING})'
+)
+
+# sections that occur once per board
+_SINGLETONS = {
+    "version",
+    "generator",
+    "generator_version",
+    "general",
+    "paper",
+    "title_block",
+    "layers",
+    "setup",
+}
+
+
+@dataclass
+class PatchStats:
+    kept: int = 0
+    replaced: int = 0
+    added: int = 0
+    removed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.kept} kept, {self.replaced} replaced,"
+            f" {self.added} added, {self.removed} removed"
+        )
+
+
+def _head(item: str) -> str:
+    match = _HEAD.match(item)
+    return match.group(1) if match else ""
+
+
+def _children(item: str) -> list[str]:
+    return [item[start:end] for start, end in iter_items(item)]
+
+
+def _normalize(item: str) -> str:
+    """
+    Content of an item without uuids, whitespace and number formatting, so
+    regenerated uuids or a different float format do not count as changes.
+    """
+
+    item = _UUID.sub("", item)
+    item = _NUMBER.sub(lambda m: repr(float(m.group())).removesuffix(".0"), item)
+    return " ".join(item.split())
+
+
+def _atoms(item: str) -> str:
+    """
+    An item without its child expressions, e.g the library name of a footprint.
+    """
+
+    spans = list(iter_items(item))
+    starts = [0] + [end for _, end in spans]
+    ends = [start for start, _ in spans] + [len(item)]
+    return _normalize(" ".join(item[a:b] for a, b in zip(starts, ends)))
+
+
+def _identity(item: str) -> Hashable | None:
+    head = _head(item)
+    if head in _SINGLETONS:
+        return (head,)
+    if head == "net":
+        return (head, item[len("(net") :].split(maxsplit=1)[0].rstrip(")"))
+
+    children = _children(item)
+    if head == "footprint":
+        for child in children:
+            if match := _REFERENCE.match(child):
+                return (head, match.group(1))
+    if head == "zone":
+        fields = {_head(c): c for c in children if _head(c) in ["name", "layer"]}
+        if "name" in fields:
+            return (head, fields["name"], fields.get("layer"))
+    for child in children:
+        if _head(child) in ["uuid", "tstamp"]:
+            return (head, " ".join(child.split()))
+    return None
+
+
+def _match(old_items: list[str], new_items: list[str]) -> dict[int, int]:
+    """
+    new item index -> old item index
+    """
+
+    matches: dict[int, int] = {}
+
+    by_content: defaultdict[str, deque[int]] = defaultdict(deque)
+    for i, item in enumerate(old_items):
+        by_content[_normalize(item)].append(i)
+    for j, item in enumerate(new_items):
+        if candidates := by_content.get(_normalize(item)):
+            matches[j] = candidates.popleft()
+
+    matched = set(matches.values())
+    by_identity: defaultdict[Hashable, deque[int]] = defaultdict(deque)
+    for i, item in enumerate(old_items):
+        if i not in matched and (key := _identity(item)) is not None:
+            by_identity[key].append(i)
+    for j, item in enumerate(new_items):
+        if j in matches or (key := _identity(item)) is None:
+            continue
+        if candidates := by_identity.get(key):
+            matches[j] = candidates.popleft()
+
+    return matches
+
+
+def patch_items(old: str, new: str, depth: int = 2) -> tuple[str, PatchStats]:
+    """
+    old with the top-level items changed, added or removed in new applied.
+    Added items go after the item that precedes them in new.
+
+    depth: changed items are patched the same way down to this level, e.g a
+        moved footprint only changes its position, not its whole text
+    """
+
+    stats = PatchStats()
+    old_spans = list(iter_items(old))
+    new_items = [new[start:end] for start, end in iter_items(new)]
+    if not old_spans:
+        stats.added = len(new_items)
+        return new, stats
+
+    old_items = [old[start:end] for start, end in old_spans]
+    matches = _match(old_items, new_items)
+
+    replacement: dict[int, str] = {}
+    inserts: defaultdict[int, list[str]] = defaultdict(list)
+    anchor = -1
+    for j, item in enumerate(new_items):
+        if j not in matches:
+            inserts[anchor].append(item)
+            stats.added += 1
+            continue
+        anchor = matches[j]
+        if _normalize(item) == _normalize(old_items[anchor]):
+            stats.kept += 1
+        else:
+            old_item = old_items[anchor]
+            replacement[anchor] = (
+                patch_items(old_item, item, depth - 1)[0]
+                if depth > 1 and _atoms(old_item) == _atoms(item)
+                else item
+            )
+            stats.replaced += 1
+    kept = set(matches.values())
+
+    # whitespace in front of every item, reused to separate inserted items
+    first = old_spans[0][0]
+    prefix_end = len(old[:first].rstrip())
+    gaps = [old[prefix_end:first]] + [
+        old[end:start] for (_, end), (start, _) in zip(old_spans, old_spans[1:])
+    ]
+
+    out = [old[:prefix_end]]
+    out += [gaps[0] + item for item in inserts[-1]]
+    for i, item in enumerate(old_items):
+        if i not in kept:
+            stats.removed += 1
+            continue
+        out.append(gaps[i] + replacement.get(i, item))
+        out += [gaps[i] + added for added in inserts[i]]
+    out.append(old[old_spans[-1][1] :])
+
+    return "".join(out), stats
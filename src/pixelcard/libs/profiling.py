@@ -0,0 +1,124 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import cProfile
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageProfile:
+    name: str
+    wall_time_s: float
+    cpu_time_s: float
+    # None unless memory is traced
+    peak_memory_bytes: int | None
+
+
+class StageProfiler:
+    """
+    Records wall time and cpu time of named stages.
+    Does nothing unless enabled, so stages can always be wrapped.
+
+    memory: also record the tracemalloc peak of every stage. Tracing slows
+        down allocation heavy code a lot, so the times of such a run are not
+        comparable to the ones of a run without it.
+    cprofile_dir: if set, additionally dump a cProfile of every stage there
+        (same caveat)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        cprofile_dir: Path | None = None,
+        memory: bool = False,
+    ):
+        self.enabled = enabled
+        self.cprofile_dir = cprofile_dir
+        self.memory = memory
+        self.stages: list[StageProfile] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = self.memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.memory:
+            tracemalloc.reset_peak()
+
+        profile = cProfile.Profile() if self.cprofile_dir else None
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self.stages.append(
+                StageProfile(
+                    name=name,
+                    wall_time_s=time.perf_counter() - wall,
+                    cpu_time_s=time.process_time() - cpu,
+                    peak_memory_bytes=(
+                        tracemalloc.get_traced_memory()[1] if self.memory else None
+                    ),
+                )
+            )
+            if started_tracing:
+                tracemalloc.stop()
+            if profile and self.cprofile_dir:
+                self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(
+                    self.cprofile_dir.joinpath(f"{len(self.stages):02d}_{name}.prof")
+                )
+
+    def write_report(self, out_dir: Path, **info) -> Path | None:
+        """
+        Write the recorded stages and the given run info as a timestamped
+        json report into out_dir.
+        """
+
+        if not self.enabled:
+            return None
+
+        for stage in self.stages:
+            peak = stage.peak_memory_bytes
+            logger.info(
+                f"{stage.name:<16} wall {stage.wall_time_s:8.3f}s"
+                f" cpu {stage.cpu_time_s:8.3f}s"
+                + (f" peak {peak / 2**20:8.1f}MiB" if peak is not None else "")
+            )
+
+        now = datetime.now()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir.joinpath(f"profile_{now:%Y%m%d-%H%M%S}.json")
+        path.write_text(
+            json.dumps(
+                {
+                    "timestamp": now.isoformat(),
+                    "python": platform.python_version(),
+                    "memory_traced": self.memory,
+                    "cprofiled": self.cprofile_dir is not None,
+                    **info,
+                    "stages": [asdict(stage) for stage in self.stages],
+                },
+                indent=4,
+            )
+        )
+        logger.info(f"Profile written to {path}")
+        return path
@@ -0,0 +1,116 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Minimal s-expression helpers for editing KiCad files as text, without
+parsing the whole file into objects, and a fast loader for when the whole
+tree is needed.
+"""
+
+import re
+from copy import copy
+from typing import Any, Iterator
+
+from sexpdata import Symbol
+
+# a quoted string (with escapes) or a parenthesis
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[()]')
+
+# parenthesis | quoted string | int | float | symbol
+_END = r'(?=[\s()"]|$)'
+_LOAD_TOKEN = re.compile(
+    r'([()])|"((?:[^"\\]|\\.)*)"'
+    rf"|([-+]?\d+){_END}"
+    rf"|([-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?){_END}"
+    r'|([^\s()"]+)'
+)
+_ESCAPE = re.compile(r"\\(.)")
+# escapes sexpdata resolves, anything else is kept as is
+_ESCAPES = {
+    "\\": "\\",
+    '"': '"',
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+# symbols sexpdata maps to python values
+_CONSTANTS = {"nil": [], "t": True}
+
+
+def iter_items(text: str) -> Iterator[tuple[int, int]]:
+    """
+    Yield the (start, end) spans of the direct children of the root
+    expression, e.g the footprints, zones and texts of a kicad_pcb.
+    """
+
+    depth = 0
+    start = 0
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        if token == "(":
+            depth += 1
+            if depth == 2:
+                start = match.start()
+        elif token == ")":
+            if depth == 2:
+                yield start, match.end()
+            depth -= 1
+
+
+def loads(text: str) -> list[Any]:
+    """
+    Parse a single s-expression into the same tree sexpdata.loads returns:
+    lists, Symbols for bare atoms, str for quoted strings and int/float for
+    numbers.
+
+    Streams over the tokens of one regex with an explicit stack, instead of
+    sexpdata's character wise parser. Equal symbols and strings share one
+    object, a board repeats the same few (layers, keywords, net names)
+    thousands of times, which keeps the tree small and fast to pickle.
+    """
+
+    def unescape(match: re.Match) -> str:
+        return _ESCAPES.get(match.group(1), match.group())
+
+    symbols: dict[str, Symbol] = {}
+    strings: dict[str, str] = {}
+
+    stack: list[list[Any]] = [[]]
+    top = stack[0]
+    for match in _LOAD_TOKEN.finditer(text):
+        kind = match.lastindex
+        token = match.group(kind)
+        if kind == 3:
+            top.append(int(token))
+        elif kind == 4:
+            top.append(float(token))
+        elif kind == 1 and token == "(":
+            top = []
+            stack.append(top)
+        elif kind == 1:
+            if len(stack) == 1:
+                raise ValueError("Unbalanced closing parenthesis")
+            expr = stack.pop()
+            top = stack[-1]
+            top.append(expr)
+        elif kind == 5 and token in _CONSTANTS:
+            # fresh copy, nil is a (mutable) list
+            top.append(copy(_CONSTANTS[token]))
+        elif kind == 5:
+            if token not in symbols:
+                symbols[token] = Symbol(token)
+            top.append(symbols[token])
+        else:
+            if "\\" in token:
+                token = _ESCAPE.sub(unescape, token)
+            top.append(strings.setdefault(token, token))
+
+    if len(stack) != 1 or len(stack[0]) != 1:
+        raise ValueError("Expected exactly one balanced s-expression")
+    return stack[0][0]
+
+
+def quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
@@ -0,0 +1,92 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Track topologies for nets with many pads, e.g the power nets of an LED array.
+
+Both run in O(N log N):
+- minimum_spanning_tree: the euclidean MST is a subgraph of the Delaunay
+  triangulation, so Kruskal only has to look at its ~3N edges instead of all
+  N^2 pad pairs.
+- row_chain: pads bucketed into rows and chained row by row, alternating the
+  direction (snake), which gives parallel tracks that never cross.
+"""
+
+import numpy as np
+import shapely
+from shapely.geometry import MultiPoint
+
+Point2D = tuple[float, float]
+Edge = tuple[int, int]
+
+
+def _chain_sorted(points: np.ndarray) -> list[Edge]:
+    # degenerate inputs (collinear/duplicate points): chain along the line
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    return [(int(a), int(b)) for a, b in zip(order, order[1:])]
+
+
+def minimum_spanning_tree(points: list[Point2D]) -> list[Edge]:
+    """
+    Edges (index pairs into points) of the euclidean minimum spanning tree.
+    """
+
+    if len(points) < 2:
+        return []
+
+    coords = np.asarray(points, dtype=float)
+    index = {p: i for i, p in enumerate(map(tuple, coords.tolist()))}
+    if len(index) < len(points):
+        return _chain_sorted(coords)
+
+    edges_geom = shapely.delaunay_triangles(MultiPoint(coords), only_edges=True)
+    segments = shapely.get_coordinates(edges_geom).reshape(-1, 2, 2)
+    if len(segments) == 0:
+        return _chain_sorted(coords)
+
+    a = np.array([index[tuple(p)] for p in segments[:, 0].tolist()])
+    b = np.array([index[tuple(p)] for p in segments[:, 1].tolist()])
+    lengths = np.hypot(*(coords[a] - coords[b]).T)
+
+    # Kruskal with a union-find over the triangulation edges
+    parent = list(range(len(points)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    tree: list[Edge] = []
+    for k in np.argsort(lengths, kind="stable"):
+        ra, rb = find(int(a[k])), find(int(b[k]))
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        tree.append((int(a[k]), int(b[k])))
+        if len(tree) == len(points) - 1:
+            break
+    return tree
+
+
+def row_chain(points: list[Point2D], row_tolerance: float) -> list[Edge]:
+    """
+    Daisy chain through the pads row by row.
+
+    row_tolerance: pads whose y differs less than this are in the same row
+    """
+
+    if len(points) < 2:
+        return []
+
+    coords = np.asarray(points, dtype=float)
+    buckets = np.floor((coords[:, 1] - coords[:, 1].min()) / row_tolerance)
+    _, rows = np.unique(buckets, return_inverse=True)
+    # snake: every other row is walked right to left
+    x = np.where(rows % 2 == 0, coords[:, 0], -coords[:, 0])
+    order = np.lexsort((x, rows))
+    return [(int(a), int(b)) for a, b in zip(order, order[1:])]
+
+
+def track_length(points: list[Point2D], edges: list[Edge]) -> float:
+    return float(sum(np.hypot(*np.subtract(points[a], points[b])) for a, b in edges))
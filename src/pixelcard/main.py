@@ -10,95 +10,358 @@ Afterwards it uses the graph to export to different artifacts (e.g netlist).
 import logging
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import faebryk.libs.picker.lcsc as lcsc
 import typer
-from faebryk.libs.app.checks import run_checks
-from faebryk.libs.app.manufacturing import export_pcba_artifacts
-from faebryk.libs.app.parameters import replace_tbd_with_any
-from faebryk.libs.app.pcb import apply_design
-from faebryk.libs.font import Font
-from faebryk.libs.logging import setup_basic_logging
-from faebryk.libs.picker.picker import pick_part_recursively
-from pixelcard.app import PixelCard
-from pixelcard.pcb import transform_pcb
-from pixelcard.pickers import pick
+from pixelcard.libs.manifest import (
+    StageManifest,
+    file_digest,
+    fingerprint,
+    source_digest,
+)
+from pixelcard.libs.profiling import StageProfiler
+
+# faebryk, the app and the pcb/picker machinery take the bulk of the startup
+# time, they are imported by the stages that use them. Keeps `--help`, argument
+# errors and up-to-date runs fast.
+# Check with `python -m pixelcard.importtime`.
+if TYPE_CHECKING:
+    from pixelcard.app import PixelCard
+    from pixelcard.libs.font import CachedFont
 
 # logging settings
 logger = logging.getLogger(__name__)
 
 
-def get_font(font_path: Path, font_url: str):
-    if font_path.exists():
-        return
+ROOT = Path(__file__).parent.parent.parent
+FONT_NAME = "Minecraftia-Regular.ttf"
+FONT_URL = "https://dl.dafont.com/dl/?f=minecraftia"
+# sha256 of the ttf, every acquired copy is checked against it. Not pinned:
+# local copies (cache, mirrors) are used as they are, downloading it needs
+# PIXELCARD_FONT_ALLOW_UNPINNED=1 (see pixelcard.libs.fonts)
+FONT_SHA256: str | None = None
+PARTS_STORE = ROOT.joinpath("libs", "parts.pack")
+# faebryk connects module interfaces recursively: a new connection of a net is
+# cross connected with every member, up and down the interface hierarchy. The
+# stack grows with the LEDs on the power net, 4-6 frames per LED, the default
+# limit of 1000 ends at around 200 LEDs.
+RECURSION_LIMIT = 50000
 
-    import zipfile
-    from io import BytesIO
 
-    import requests
+# LEDText power nets with the layer they are routed on, and
+# has_pcb_routing_strategy_spatial.Topology names, for the CLI. Kept here so
+# parsing the options does not import faebryk.
+# The board has two copper layers, hv gets B.Cu. lv stays the ground pour on
+# F.Cu, where the straight tracks would cross the cells and their tracks.
+POWER_LAYERS = {"hv": "B.Cu"}
+POWER_NETS = list(POWER_LAYERS)
+POWER_TOPOLOGIES = ["mst", "row_chain"]
 
-    r = requests.get(font_url)
-    zip_content = BytesIO(r.content)
 
-    # Extract the specific file from the zip into the desired location
-    with zipfile.ZipFile(zip_content, "r") as zip_ref:
-        zip_ref.extract(font_path.name, font_path.parent)
+def parse_power_routing(values: list[str]) -> dict[str, str]:
+    """
+    ["hv=mst", ...] -> {"hv": "mst", ...}
+    """
 
+    routes = {}
+    for value in values:
+        net, _, topology = value.partition("=")
+        if net not in POWER_NETS or topology not in POWER_TOPOLOGIES:
+            raise typer.BadParameter(
+                f"{value!r}, expected <net>=<topology> with net in {POWER_NETS}"
+                f" and topology in {POWER_TOPOLOGIES}",
+                param_hint="--power-routing",
+            )
+        routes[net] = topology
+    return routes
 
-def main(
-    visualize_graph: bool = typer.Option(False, help="Visualize the faebryk graph"),
-    export_artifacts: bool = typer.Option(False, help="Export PCBA artifacts"),
-    led_text: str = typer.Argument("PixelCard", help="Text to convert into LEDText."),
-    contact_info: str = typer.Argument(help="Your contact information."),
+
+def setup_part_library(build_dir: Path):
+    import faebryk.libs.picker.lcsc as lcsc
+    from pixelcard.libs.partstore import PartsStore
+
+    lcsc.BUILD_FOLDER = build_dir
+    lcsc.LIB_FOLDER = ROOT.joinpath("libs")
+
+    # prebuilt catalog, makes the lcsc picker work offline. Served from
+    # memory, stays open for the lifetime of the process.
+    if PARTS_STORE.exists():
+        PartsStore(PARTS_STORE).install(lcsc)
+
+
+def fetch_font(build_dir: Path) -> Path:
+    from pixelcard.libs.fonts import FontProvider, FontSource
+
+    provider = FontProvider.default(build_dir / Path("cache") / Path("fonts"))
+    return provider.get(FontSource(FONT_NAME, FONT_URL, sha256=FONT_SHA256))
+
+
+def load_font(build_dir: Path, font_path: Path | None = None) -> "CachedFont":
+    """
+    font_path: the already fetched font, fetched if not given
+    """
+
+    from pixelcard.libs.font import CachedFont
+
+    if font_path is None:
+        font_path = fetch_font(build_dir)
+    return CachedFont(
+        font_path,
+        cache_dir=build_dir / Path("cache") / Path("fonts") / Path("polygons"),
+    )
+
+
+def build_card(
+    app: "PixelCard",
+    pcbfile: Path,
+    netlist_path: Path,
+    manufacturing_artifacts: Path | None = None,
+    profiler: StageProfiler | None = None,
+    minimal_diff: bool = False,
+    cache_dir: Path | None = None,
 ):
+    """
+    Run all stages after app construction: parameter filling, picking, checks,
+    netlist & pcb generation and optionally the manufacturing export.
+
+    minimal_diff: patch only the changed items into an existing pcbfile
+        instead of rewriting it, see apply_design_minimal_diff
+    cache_dir: cache the parsed board there
+    """
+
+    from faebryk.libs.app.checks import run_checks
+    from faebryk.libs.app.manufacturing import export_pcba_artifacts
+    from faebryk.libs.app.parameters import replace_tbd_with_any
+    from faebryk.libs.picker.picker import pick_part_recursively
+    from pixelcard.libs.parse_cache import ParseCache
+    from pixelcard.pcb import PCB_PARSER, apply_design_cached, apply_design_minimal_diff
+    from pixelcard.pickers import pick, pick_cache, picker_registry
+
+    profiler = profiler or StageProfiler()
+
+    with profiler.stage("parameters"):
+        logger.info("Filling unspecified parameters")
+        replace_tbd_with_any(app, recursive=True)
+
+    # pick parts
+    with profiler.stage("pick"):
+        pick_part_recursively(app, pick)
+    pick_cache.report()
+    picker_registry.report()
+
+    with profiler.stage("checks"):
+        G = app.get_graph()
+        run_checks(app, G)
+
+    # netlist & pcb
+    pcb_cache = ParseCache(cache_dir, PCB_PARSER) if cache_dir else None
+    with profiler.stage("apply_design"):
+        if minimal_diff and pcbfile.exists():
+            apply_design_minimal_diff(pcbfile, netlist_path, G, app, pcb_cache)
+        else:
+            apply_design_cached(pcbfile, netlist_path, G, app, pcb_cache)
+
+    # generate pcba manufacturing and other artifacts
+    if manufacturing_artifacts is not None:
+        with profiler.stage("export"):
+            export_pcba_artifacts(manufacturing_artifacts, pcbfile, app)
+
+
+def run(
+    led_text: str,
+    contact_info: str,
+    build_dir: Path,
+    export_artifacts: bool,
+    force: bool,
+    profiler: StageProfiler,
+    minimal_diff: bool = False,
+    power_routing: dict[str, str] | None = None,
+):
+    """
+    power_routing: power net of the LEDs (see POWER_LAYERS) -> topology name of
+        has_pcb_routing_strategy_spatial ("mst"/"row_chain")
+    """
+
+    from importlib.metadata import version
+
+    power_routing = power_routing or {}
+
     # paths --------------------------------------------------
-    build_dir = Path("./build")
-    font_cache_dir = build_dir / Path("cache") / Path("fonts")
     faebryk_build_dir = build_dir.joinpath("faebryk")
     faebryk_build_dir.mkdir(parents=True, exist_ok=True)
-    root = Path(__file__).parent.parent.parent
     netlist_path = faebryk_build_dir.joinpath("faebryk.net")
-    kicad_prj_path = root.joinpath("source")
+    kicad_prj_path = ROOT.joinpath("source")
     pcbfile = kicad_prj_path.joinpath("main.kicad_pcb")
     manufacturing_artifacts = build_dir.joinpath("manufacturing_artifacts")
 
-    lcsc.BUILD_FOLDER = build_dir
-    lcsc.LIB_FOLDER = root.joinpath("libs")
-
     # Get font
-    font_path = font_cache_dir / Path("Minecraftia-Regular.ttf")
-    font_url = "https://dl.dafont.com/dl/?f=minecraftia"
-    get_font(font_path, font_url)
+    with profiler.stage("font"):
+        font_path = fetch_font(build_dir)
+
+    # Incremental build --------------------------------------
+    # The contact info only ends up as text on the back of the board, so if
+    # nothing else changed the existing design is reused and only that text
+    # is replaced.
+    manifest = StageManifest(faebryk_build_dir.joinpath("manifest.json"))
+    design_inputs = fingerprint(
+        led_text,
+        sorted(power_routing.items()),
+        file_digest(font_path),
+        source_digest(Path(__file__).parent),
+        version("faebryk"),
+    )
+    contact_inputs = fingerprint(design_inputs, contact_info)
+
+    design_fresh = manifest.is_fresh("design", design_inputs) and (
+        manifest.outputs_intact("contact")
+    )
+    export_fresh = manifest.is_fresh("export", contact_inputs)
+
+    if not force and design_fresh and (export_fresh or not export_artifacts):
+        logger.info("Design unchanged, skipping app, picking, checks & layout")
+        if manifest.is_fresh("contact", contact_inputs):
+            logger.info("Contact info unchanged, nothing to do")
+            return
+        from pixelcard.board import update_contact_info
+
+        with profiler.stage("contact_info"):
+            update_contact_info(pcbfile, contact_info, font_path)
+        manifest.record("contact", contact_inputs, [pcbfile])
+        return
 
     # Run app
+    from pixelcard.app import PixelCard
+    from pixelcard.library.has_pcb_routing_strategy_spatial import (
+        has_pcb_routing_strategy_spatial,
+    )
+
+    setup_part_library(build_dir)
+    with profiler.stage("font_load"):
+        font = load_font(build_dir, font_path)
+
     try:
-        sys.setrecursionlimit(50000)  # TODO needs optimization
-        app = PixelCard(
-            font=Font(font_path),
-            _text=led_text,
-            contact_info=contact_info,
-        )
+        sys.setrecursionlimit(RECURSION_LIMIT)
+        with profiler.stage("app"):
+            app = PixelCard(
+                font=font,
+                _text=led_text,
+                contact_info=contact_info,
+                power_routing={
+                    net: (
+                        has_pcb_routing_strategy_spatial.Topology[topology.upper()],
+                        POWER_LAYERS[net],
+                    )
+                    for net, topology in power_routing.items()
+                },
+            )
     except RecursionError:
         logger.error("RECURSION ERROR ABORTING")
         return
 
-    logger.info("Filling unspecified parameters")
-    replace_tbd_with_any(app, recursive=True)
+    build_card(
+        app,
+        pcbfile,
+        netlist_path,
+        manufacturing_artifacts if export_artifacts else None,
+        profiler,
+        minimal_diff,
+        build_dir.joinpath("cache"),
+    )
 
-    # pick parts
-    pick_part_recursively(app, pick)
+    manifest.record("design", design_inputs, [netlist_path])
+    manifest.record("contact", contact_inputs, [pcbfile])
+    if export_artifacts:
+        manifest.record("export", contact_inputs, [manufacturing_artifacts])
 
-    G = app.get_graph()
-    run_checks(app, G)
 
-    # netlist & pcb
-    apply_design(pcbfile, netlist_path, G, app, transform=transform_pcb)
+def main(
+    visualize_graph: bool = typer.Option(False, help="Visualize the faebryk graph"),
+    export_artifacts: bool = typer.Option(False, help="Export PCBA artifacts"),
+    led_text: str = typer.Argument("PixelCard", help="Text to convert into LEDText."),
+    contact_info: str = typer.Argument(help="Your contact information."),
+    force: bool = typer.Option(False, help="Rerun all stages, ignore the manifest"),
+    profile: bool = typer.Option(
+        False, help="Record the time per stage into build/profile"
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        help="With --profile, also record the peak memory per stage."
+        " Tracing slows the stages down, time them in a separate run",
+    ),
+    profile_cprofile: bool = typer.Option(
+        False, help="With --profile, also dump a cProfile per stage"
+    ),
+    estimate: bool = typer.Option(
+        False, help="Only estimate LED count, BOM, current & cost, build nothing"
+    ),
+    preview: bool = typer.Option(
+        False, help="Only render the layout to build/preview.svg, build nothing"
+    ),
+    minimal_diff: bool = typer.Option(
+        False,
+        help="Patch only the changed PCB items instead of rewriting the PCB."
+        " Keeps unchanged items byte for byte for small diffs, but is slower"
+        " than a full rewrite",
+    ),
+    power_routing: list[str] = typer.Option(
+        [],
+        help="Route a power net of all LEDs as one net, as <net>=<topology>"
+        f" with net {'/'.join(POWER_NETS)} and topology"
+        f" {'/'.join(POWER_TOPOLOGIES)}, e.g hv=mst. Repeatable",
+    ),
+):
+    from importlib.metadata import version
 
-    # generate pcba manufacturing and other artifacts
-    if export_artifacts:
-        export_pcba_artifacts(manufacturing_artifacts, pcbfile, app)
+    from faebryk.libs.logging import setup_basic_logging
+
+    setup_basic_logging()
+
+    build_dir = Path("./build")
+    power_routes = parse_power_routing(power_routing)
+
+    if estimate:
+        from pixelcard.estimate import estimate as estimate_card
+        from pixelcard.estimate import load_prices, report
+
+        prices = load_prices(build_dir, PARTS_STORE)
+        report(estimate_card(led_text, load_font(build_dir), prices=prices))
+        return
+
+    if preview:
+        from pixelcard.preview import write_preview
+
+        out = write_preview(
+            build_dir.joinpath("preview.svg"), led_text, load_font(build_dir)
+        )
+        logger.info(f"Preview written to {out}")
+        return
+
+    profile_dir = build_dir.joinpath("profile")
+    profiler = StageProfiler(
+        enabled=profile,
+        cprofile_dir=profile_dir.joinpath("cprofile") if profile_cprofile else None,
+        memory=profile_memory,
+    )
+
+    try:
+        run(
+            led_text,
+            contact_info,
+            build_dir,
+            export_artifacts,
+            force,
+            profiler,
+            minimal_diff,
+            power_routes,
+        )
+    finally:
+        profiler.write_report(
+            profile_dir,
+            faebryk=version("faebryk"),
+            led_text=led_text,
+            led_text_length=len(led_text),
+        )
 
 
 if __name__ == "__main__":
-    setup_basic_logging()
     typer.run(main)
@@ -1,12 +1,14 @@
-from faebryk.core.core import Module
+from dataclasses import dataclass, field
+
+from faebryk.core.core import Module, Parameter
 from faebryk.exporters.pcb.layout.absolute import LayoutAbsolute
-from faebryk.exporters.pcb.layout.font import FontLayout
+from faebryk.exporters.pcb.layout.layout import Layout
 from faebryk.exporters.pcb.layout.typehierarchy import LayoutTypeHierarchy
 from faebryk.library.ElectricPower import ElectricPower
 from faebryk.library.has_pcb_layout_defined import has_pcb_layout_defined
 from faebryk.library.has_pcb_position import has_pcb_position
-from faebryk.library.has_pcb_routing_strategy_greedy_direct_line import (
-    has_pcb_routing_strategy_greedy_direct_line,
+from faebryk.library.has_pcb_position_defined_relative_to_parent import (
+    has_pcb_position_defined_relative_to_parent,
 )
 from faebryk.library.LED import LED
 from faebryk.library.PoweredLED import PoweredLED
@@ -14,9 +16,84 @@ from faebryk.library.Resistor import Resistor
 from faebryk.libs.brightness import TypicalLuminousIntensity
 from faebryk.libs.font import Font
 from faebryk.libs.util import times
+from pixelcard.library.has_pcb_routing_strategy_spatial import (
+    has_pcb_routing_strategy_spatial,
+)
+from pixelcard.libs.glyphs import text_layout
+
+
+def cell_layout() -> Layout:
+    """
+    Layout of the resistor relative to the LED of one cell.
+    """
+
+    return LayoutTypeHierarchy(
+        layouts=[
+            LayoutTypeHierarchy.Level(
+                mod_type=LED,
+                layout=LayoutAbsolute(
+                    has_pcb_position.Point((0, 0, 90, has_pcb_position.layer_type.NONE))
+                ),
+            ),
+            LayoutTypeHierarchy.Level(
+                mod_type=Resistor,
+                layout=LayoutAbsolute(
+                    has_pcb_position.Point(
+                        (
+                            1.1,
+                            -0.25,
+                            -90,
+                            has_pcb_position.layer_type.NONE,
+                        )
+                    )
+                ),
+            ),
+        ]
+    )
+
+
+@dataclass(frozen=True)
+class LEDCellTemplate:
+    """
+    Settings shared by all LED cells.
+
+    The parameter values, layout and routing are created once per template
+    instead of once per cell. stamp() still constructs every cell from
+    scratch (a new PoweredLED with its LED and resistor) and merges the
+    shared parameters into it, faebryk can not copy a subgraph.
+
+    layout and routing are not attached to the cells, LEDText applies them to
+    all cells at once with a single trait each.
+    """
+
+    color: LED.Color = LED.Color.RED
+    brightness: Parameter = field(
+        default_factory=lambda: (
+            TypicalLuminousIntensity.APPLICATION_LED_INDICATOR_INSIDE.value.value
+        )
+    )
+    layout: Layout = field(default_factory=cell_layout)
+    # topology of the nets inside a cell
+    routing: has_pcb_routing_strategy_spatial.Topology = (
+        has_pcb_routing_strategy_spatial.Topology.MST
+    )
+
+    def stamp(self) -> PoweredLED:
+        cell = PoweredLED()
+        # Parametrize
+        cell.NODEs.led.PARAMs.color.merge(self.color)
+        cell.NODEs.led.PARAMs.brightness.merge(self.brightness)
+        return cell
 
 
 class LEDText(Module):
+    """
+    power_routing: route the "hv" and/or "lv" net of the power interface of
+        all cells with has_pcb_routing_strategy_spatial, as (topology, layer),
+        on top of the per-cell routing. The layer must differ from the one of
+        the cells and of the other net.
+    """
+
     def __init__(
         self,
         text: str,
@@ -24,30 +101,35 @@ class LEDText(Module):
         font_size: float,
         bbox: tuple[float, float] | None = None,
         scale_to_fit: bool = False,
+        density: float = 0.13,
+        template: LEDCellTemplate | None = None,
+        power_routing: dict[str, tuple[has_pcb_routing_strategy_spatial.Topology, str]]
+        | None = None,
     ) -> None:
         super().__init__()
 
-        led_layout = FontLayout(
+        self.power_routing = power_routing or {}
+
+        self.text_layout = text_layout(
             font=font,
             text=text,
             font_size=font_size,
-            density=0.13,
+            density=density,
             bbox=bbox,
             scale_to_fit=scale_to_fit,
         )
 
-        num_leds = led_layout.get_count()
+        num_leds = len(self.text_layout.leds)
 
         class _IFs(Module.IFS()):
             power = ElectricPower()
 
         self.IFs = _IFs(self)
 
+        template = template or LEDCellTemplate()
+
         class _NODES(Module.NODES()):
-            leds = times(
-                num_leds,
-                PoweredLED,
-            )
+            leds = times(num_leds, template.stamp)
 
         self.NODEs = _NODES(self)
 
@@ -55,46 +137,39 @@ class LEDText(Module):
 
         self.PARAMs = _PARAMs(self)
 
+        # faebryk cross connects every member of a net with all others, bus
+        # segments in between would only add members
         for led in self.NODEs.leds:
             led.IFs.power.connect(self.IFs.power)
-            # Parametrize
-            led.NODEs.led.PARAMs.color.merge(LED.Color.RED)
-            led.NODEs.led.PARAMs.brightness.merge(
-                TypicalLuminousIntensity.APPLICATION_LED_INDICATOR_INSIDE.value.value
-            )
 
-        # Resistor relative to LED layout
-        for led in self.NODEs.leds:
+        for led, (x, y) in zip(self.NODEs.leds, self.text_layout.leds):
             led.add_trait(
-                has_pcb_layout_defined(
-                    LayoutTypeHierarchy(
-                        layouts=[
-                            LayoutTypeHierarchy.Level(
-                                mod_type=LED,
-                                layout=LayoutAbsolute(
-                                    has_pcb_position.Point(
-                                        (0, 0, 90, has_pcb_position.layer_type.NONE)
-                                    )
-                                ),
-                            ),
-                            LayoutTypeHierarchy.Level(
-                                mod_type=Resistor,
-                                layout=LayoutAbsolute(
-                                    has_pcb_position.Point(
-                                        (
-                                            1.1,
-                                            -0.25,
-                                            -90,
-                                            has_pcb_position.layer_type.NONE,
-                                        )
-                                    )
-                                ),
-                            ),
-                        ]
-                    )
+                has_pcb_position_defined_relative_to_parent(
+                    has_pcb_position.Point((x, y, 0, has_pcb_position.layer_type.NONE))
                 )
             )
 
-            led.add_trait(has_pcb_routing_strategy_greedy_direct_line())
-
-        led_layout.apply(*self.NODEs.leds)
+        # one layout and one routing strategy for all cells, instead of a
+        # trait per cell
+        self.add_trait(
+            has_pcb_layout_defined(
+                LayoutTypeHierarchy(
+                    layouts=[
+                        LayoutTypeHierarchy.Level(
+                            mod_type=PoweredLED, layout=template.layout
+                        )
+                    ]
+                )
+            )
+        )
+        power_nets = {
+            getattr(self.IFs.power.IFs, net): routing
+            for net, routing in self.power_routing.items()
+        }
+        self.add_trait(
+            has_pcb_routing_strategy_spatial(
+                {mif: topology for mif, (topology, _) in power_nets.items()},
+                default=template.routing,
+                layers={mif: layer for mif, (_, layer) in power_nets.items()},
+            )
+        )
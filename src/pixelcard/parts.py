@@ -0,0 +1,57 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Tools for the packed parts store (see pixelcard.libs.partstore).
+
+Export the parts cached by a build into one catalog file, ship that file to
+other machines and import it there (or just place it at libs/parts.pack)
+to build without network access.
+"""
+
+import logging
+from pathlib import Path
+
+import typer
+from faebryk.libs.logging import setup_basic_logging
+from pixelcard.libs.partstore import PartsStore, pack_parts
+from pixelcard.main import PARTS_STORE, ROOT
+
+logger = logging.getLogger(__name__)
+
+app = typer.Typer()
+
+BUILD_DIR = Path("./build")
+
+
+@app.command("export")
+def export_parts(
+    parts: list[str] = typer.Argument(None, help="Part numbers (default: all)"),
+    out: Path = typer.Option(PARTS_STORE, help="Store file to write"),
+):
+    count = pack_parts(out, BUILD_DIR, ROOT.joinpath("libs"), parts or None)
+    logger.info(f"Packed {count} parts into {out}")
+
+
+@app.command("import")
+def import_parts(
+    store: Path = typer.Argument(..., help="Store file to unpack"),
+):
+    with PartsStore(store) as parts_store:
+        for partno in parts_store.parts:
+            parts_store.materialize(partno, BUILD_DIR, ROOT.joinpath("libs"))
+        logger.info(f"Unpacked {len(parts_store.parts)} parts from {store}")
+
+
+@app.command("list")
+def list_parts(
+    store: Path = typer.Argument(PARTS_STORE, help="Store file to list"),
+):
+    with PartsStore(store) as parts_store:
+        for partno, files in parts_store.parts.items():
+            print(f"{partno:<12}" + " ".join(f.path for f in files))
+
+
+if __name__ == "__main__":
+    setup_basic_logging()
+    app()
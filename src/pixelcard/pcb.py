@@ -2,11 +2,10 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import shutil
+from pathlib import Path
 
-from faebryk.core.util import (
-    get_all_nodes,
-    get_first_child_of_type,
-)
+from faebryk.core.graph import Graph
 from faebryk.exporters.pcb.kicad.transformer import PCB_Transformer, Zone
 from faebryk.exporters.pcb.layout.absolute import LayoutAbsolute
 from faebryk.exporters.pcb.layout.typehierarchy import LayoutTypeHierarchy
@@ -22,10 +21,27 @@ from faebryk.library.has_pcb_routing_strategy_manual import (
 from faebryk.library.has_pcb_routing_strategy_via_to_layer import (
     has_pcb_routing_strategy_via_to_layer,
 )
-from faebryk.libs.font import Font as Ffont
-from faebryk.libs.kicad.pcb import At, Font
+from faebryk.libs.app.kicad_netlist import write_netlist
+from faebryk.libs.app.pcb import apply_layouts, apply_netlist, apply_routing
+from faebryk.libs.kicad.pcb import PCB, At, Font
 from pixelcard.app import PixelCard
+from pixelcard.board import (
+    CREDITCARD_CORNER_RADIUS,
+    CREDITCARD_HEIGHT,
+    CREDITCARD_WIDTH,
+    TEXT_SIMPLIFY_TOLERANCE,
+    get_contact_info_face,
+    get_contact_info_lines,
+    get_logo_placement,
+    get_text_bottom,
+    get_usb_c_placement,
+)
 from pixelcard.library.Faebryk_Logo import Faebryk_Logo
+from pixelcard.libs.geometry import fracture, merge_polygons
+from pixelcard.libs.node_index import NodeIndex
+from pixelcard.libs.parse_cache import ParseCache
+from pixelcard.libs.pcb_patch import patch_items
+from pixelcard.libs.sexp import loads
 from pixelcard.modules.LEDText import LEDText
 from pixelcard.modules.USB_C_5V_PSU_16p_Receptical import USB_C_5V_PSU_16p_Receptical
 
@@ -36,61 +52,55 @@ Here you can do PCB scripting.
 E.g placing components, layer switching, mass renaming, etc.
 """
 
+# bump when the parsed tree changes, to invalidate cached boards
+PCB_PARSER = "kicad_pcb-sexp-1"
+
 
 def transform_pcb(transformer: PCB_Transformer):
     app = transformer.app
     assert isinstance(app, PixelCard)
 
-    # create pcb outline in shape of a credit card
-    creditcard_width = 85.6
-    creditcard_height = 53.98
+    # one traversal for all node lookups below
+    index = NodeIndex(app)
 
+    # create pcb outline in shape of a credit card
     transformer.set_pcb_outline_complex(
         transformer.create_rectangular_edgecut(
-            width_mm=creditcard_width,
-            height_mm=creditcard_height,
+            width_mm=CREDITCARD_WIDTH,
+            height_mm=CREDITCARD_HEIGHT,
             rounded_corners=True,
-            corner_radius_mm=3.18,
+            corner_radius_mm=CREDITCARD_CORNER_RADIUS,
         ),
         remove_existing_outline=True,
     )
 
-    font = Ffont(app.font.path)
-
-    polygons = font.string_to_polygons(
-        app.font_settings["text"],
-        app.font_settings["font_size"],
-        bbox=app.font_settings["bbox"],
-        scale_to_fit=app.font_settings["scale_to_fit"],
+    # same geometry the LEDs were placed in, glyphs merged into one zone per
+    # connected shape and simplified
+    polygons = merge_polygons(
+        app.NODEs.text.text_layout.polygons, TEXT_SIMPLIFY_TOLERANCE
     )
 
-    for polygon in polygons:
-        transformer.insert(
-            Zone.factory(
-                net=0,
-                net_name="Text",
-                layer="F.SilkS",
-                uuid=transformer.gen_uuid(mark=True),
-                name="Text_polygon",
-                polygon=[
-                    (
-                        p[0] + app.font_settings["pcb_offset"][0],
-                        p[1] + app.font_settings["pcb_offset"][1],
-                    )
-                    for p in polygon.exterior.coords
-                ],
-            )
+    offset_x, offset_y = app.font_settings["pcb_offset"]
+    zones = [
+        Zone.factory(
+            net=0,
+            net_name="Text",
+            layer="F.SilkS",
+            uuid=transformer.gen_uuid(mark=True),
+            name="Text_polygon",
+            polygon=[(x + offset_x, y + offset_y) for x, y in fracture(polygon)],
         )
+        for polygon in polygons
+    ]
+    for zone in zones:
+        transformer.insert(zone)
 
-    ledtext_height = (
-        max([p.bounds[3] for p in polygons]) + app.font_settings["pcb_offset"][1]
-    )
+    text_bottom = get_text_bottom(polygons)
 
     # move all reference designators to the same position
     footprints = [
         cmp.get_trait(PCB_Transformer.has_linked_kicad_footprint).get_fp()
-        for cmp in get_all_nodes(transformer.app)
-        if cmp.has_trait(PCB_Transformer.has_linked_kicad_footprint)
+        for cmp in index.with_trait(PCB_Transformer.has_linked_kicad_footprint)
     ]
 
     for f in footprints:
@@ -98,17 +108,11 @@ def transform_pcb(transformer: PCB_Transformer):
         f.reference.at.coord = (2.25, 0, 0)
         f.reference.font = Font.factory(size=(0.5, 0.5), thickness=0.1)  # 0.075)
 
-    font = app.font
-    font_name = font.path.stem
-    bold = False
-    if "-Bold" in font_name:
-        font_name, _ = font_name.split("-Bold")
-        bold = True
-
-    for i, line in enumerate(app.contact_info.split("\\n")):
+    font_name, bold = get_contact_info_face(app.font.path)
+    for line, pos in get_contact_info_lines(app.contact_info):
         transformer.insert_text(
             text=line,
-            at=At.factory((creditcard_width / 3, creditcard_height / 3 + i * 5)),
+            at=At.factory(pos),
             font=Font.factory(
                 size=(2, 2),
                 thickness=0.1,
@@ -118,19 +122,23 @@ def transform_pcb(transformer: PCB_Transformer):
             front=False,
         )
 
-    app.NODEs.net_vbus.add_trait(
-        has_pcb_routing_strategy_via_to_layer(
-            "B.Cu",
-            (0.8, 0.3),
+    # power nets routed by the LEDText span the whole net already
+    power_routing = app.NODEs.text.power_routing
+    if "hv" not in power_routing:
+        app.NODEs.net_vbus.add_trait(
+            has_pcb_routing_strategy_via_to_layer(
+                "B.Cu",
+                (0.8, 0.3),
+            )
         )
-    )
-    app.NODEs.net_gnd.add_trait(
-        has_pcb_routing_strategy_via_to_layer(
-            "F.Cu",
-            (0.5, 0.5),
+    if "lv" not in power_routing:
+        app.NODEs.net_gnd.add_trait(
+            has_pcb_routing_strategy_via_to_layer(
+                "F.Cu",
+                (0.5, 0.5),
+            )
         )
-    )
-    app.NODEs.net_gnd.get_trait(has_pcb_routing_strategy).priority = 1.0
+        app.NODEs.net_gnd.get_trait(has_pcb_routing_strategy).priority = 1.0
 
     # vbus routing usb-c connector
     usb_con = app.NODEs.usb_psu.NODEs.usb
@@ -161,7 +169,7 @@ def transform_pcb(transformer: PCB_Transformer):
         )
     )
 
-    get_first_child_of_type(app.NODEs.usb_psu, Capacitor).IFs.unnamed[0].add_trait(
+    index.first_of_type(Capacitor, within=app.NODEs.usb_psu).IFs.unnamed[0].add_trait(
         has_pcb_routing_strategy_via_to_layer("B.Cu", (0, -1))
     )
 
@@ -191,29 +199,13 @@ def transform_pcb(transformer: PCB_Transformer):
                     LayoutTypeHierarchy.Level(
                         mod_type=USB_C_5V_PSU_16p_Receptical,
                         layout=LayoutAbsolute(
-                            Point(
-                                (
-                                    creditcard_width - 4.5,
-                                    ledtext_height
-                                    + (creditcard_height - ledtext_height) / 2,
-                                    90,
-                                    L.NONE,
-                                )
-                            )
+                            Point((*get_usb_c_placement(text_bottom), L.NONE))
                         ),
                     ),
                     LayoutTypeHierarchy.Level(
                         mod_type=Faebryk_Logo,
                         layout=LayoutAbsolute(
-                            Point(
-                                (
-                                    creditcard_width / 2,
-                                    ledtext_height
-                                    + (creditcard_height - ledtext_height) / 2,
-                                    0,
-                                    L.NONE,
-                                )
-                            )
+                            Point((*get_logo_placement(text_bottom), L.NONE))
                         ),
                     ),
                 ]
@@ -222,3 +214,106 @@ def transform_pcb(transformer: PCB_Transformer):
     )
     # set coordinate system
     app.add_trait(has_pcb_position_defined(Point((0, 0, 0, L.TOP_LAYER))))
+
+
+def load_pcb(pcbfile: Path, cache: ParseCache | None = None) -> PCB:
+    """
+    Load a board with the fast s-expression loader, through the parse cache
+    if given.
+    """
+
+    tree = cache.load(pcbfile, loads) if cache else loads(pcbfile.read_text())
+    return PCB(tree)
+
+
+def place_design(
+    pcbfile: Path,
+    netlist_path: Path,
+    G: Graph,
+    app: PixelCard,
+    cache: ParseCache | None = None,
+) -> PCB_Transformer:
+    """
+    First half of apply_design_cached: netlist, transform_pcb and layouts.
+    Returns the transformer of the placed but not yet routed board.
+    """
+
+    logger.info(f"Writing netlist to {netlist_path}")
+    changed = write_netlist(G, netlist_path, use_kicad_designators=True)
+    apply_netlist(pcbfile, netlist_path, changed)
+
+    logger.info("Load PCB")
+    pcb = load_pcb(pcbfile, cache)
+    if cache:
+        logger.info(f"PCB parse cache: {cache.hits} hits, {cache.misses} misses")
+
+    transformer = PCB_Transformer(pcb, G, app)
+
+    logger.info("Transform PCB")
+    transform_pcb(transformer)
+
+    apply_layouts(app)
+    transformer.move_footprints()
+    return transformer
+
+
+def apply_design_cached(
+    pcbfile: Path,
+    netlist_path: Path,
+    G: Graph,
+    app: PixelCard,
+    cache: ParseCache | None = None,
+):
+    """
+    Same steps as faebryk's apply_design with transform_pcb, but the board is
+    loaded with load_pcb instead of being parsed again on every run. The
+    written board is cached with its tree, so the next run loads it without
+    parsing.
+    """
+
+    transformer = place_design(pcbfile, netlist_path, G, app, cache)
+    apply_routing(app, transformer)
+
+    logger.info(f"Writing pcbfile {pcbfile}")
+    transformer.pcb.dump(pcbfile)
+    if cache:
+        # dump garbage collects the tree into exactly what the file parses to
+        cache.store(pcbfile, transformer.pcb.node)
+
+
+def apply_design_minimal_diff(
+    pcbfile: Path,
+    netlist_path: Path,
+    G: Graph,
+    app: PixelCard,
+    cache: ParseCache | None = None,
+):
+    """
+    apply_design_cached, but instead of rewriting the whole board
+    only the footprints, zones, tracks, ... that changed are patched into it.
+    Everything else keeps its exact text, and the file is not touched at all
+    if nothing changed.
+
+    This is for small diffs, not for speed: the whole board is still
+    transformed and dumped to a scratch copy first, and then compared item by
+    item, so this costs more than apply_design_cached.
+    """
+
+    # generate next to the board, so project relative paths still resolve
+    scratch = pcbfile.with_name(f".{pcbfile.stem}.faebryk{pcbfile.suffix}")
+    shutil.copyfile(pcbfile, scratch)
+    try:
+        # not cached, the scratch copy is never loaded again
+        transformer = place_design(scratch, netlist_path, G, app, cache)
+        apply_routing(app, transformer)
+        transformer.pcb.dump(scratch)
+        old = pcbfile.read_text()
+        patched, stats = patch_items(old, scratch.read_text())
+    finally:
+        scratch.unlink(missing_ok=True)
+
+    logger.info(f"PCB items: {stats}")
+    if patched == old:
+        logger.info("PCB unchanged")
+        return
+    pcbfile.write_text(patched)
@@ -2,6 +2,8 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+from collections import Counter
+from typing import Callable, TypeVar
 
 from faebryk.core.core import Module
 from faebryk.library.Capacitor import Capacitor
@@ -10,223 +12,339 @@ from faebryk.library.Fuse import Fuse
 from faebryk.library.LED import LED
 from faebryk.library.Resistor import Resistor
 from faebryk.libs.picker.lcsc import LCSC_Part
-from faebryk.libs.picker.picker import PickerOption, pick_module_by_params
+from faebryk.libs.picker.picker import (
+    PickerOption,
+    PickError,
+    has_part_picked,
+    pick_module_by_params,
+)
+from pixelcard.catalog import (
+    CAPACITOR_100N,
+    FUSE_1A,
+    LED_RED,
+    RESISTOR_5K1,
+    RESISTOR_100R,
+    USB_C_RECEPTACLE_16P,
+)
 from pixelcard.library.USB_Type_C_Receptacle_16_pin import (
     USB_Type_C_Receptacle_16_pin,
 )
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T", bound=Module)
+
 """
 This file is for picking actual electronic components for your design.
 You can make use of faebryk's picker & parameter system to do this.
 """
 
+
+class PickCache:
+    """
+    Remembers which option was picked for a module type and the values of the
+    parameters the options constrain. Structurally identical modules (e.g all
+    LEDs of the text) then only scan the option list once.
+
+    Only modules whose constrained parameters all narrow down to Constants are
+    cached. Ranges, sets and other parameters are not reduced to a signature,
+    since two different ones could share it and the first option matching one
+    of them is not necessarily the first option matching the other. Option
+    lists with filters are not cached either, their result depends on the
+    module itself.
+    """
+
+    def __init__(self) -> None:
+        self.picks: dict[tuple, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    @staticmethod
+    def signature(module: Module, options: list[PickerOption]) -> tuple | None:
+        if any(o.filter for o in options):
+            return None
+
+        names = sorted({k for o in options for k in (o.params or {})})
+        values = []
+        for name in names:
+            if not hasattr(module.PARAMs, name):
+                continue
+            param = getattr(module.PARAMs, name).get_most_narrow()
+            if not isinstance(param, Constant):
+                return None
+            values.append((name, param.value))
+
+        return type(module), tuple(values)
+
+    def pick(self, module: Module, options: list[PickerOption]):
+        key = self.signature(module, options)
+        if key is None:
+            self.uncached += 1
+            pick_module_by_params(module, options)
+            return
+
+        if key in self.picks:
+            try:
+                # equal Constants pick the same first matching option, faebryk
+                # still checks it against the module params
+                pick_module_by_params(module, [options[self.picks[key]]])
+                self.hits += 1
+                return
+            except PickError:
+                logger.debug(f"Pick cache signature mismatch for {module}")
+
+        self.misses += 1
+        pick_module_by_params(module, options)
+
+        partno = module.get_trait(has_part_picked).get_part().partno
+        self.picks[key] = next(
+            i for i, o in enumerate(options) if o.part.partno == partno
+        )
+
+    def report(self):
+        logger.info(
+            f"Pick cache: {self.hits} hits, {self.misses} misses,"
+            f" {self.uncached} uncached, {len(self.picks)} distinct signatures"
+        )
+
+
+pick_cache = PickCache()
+
+
+Picker = Callable[[Module], list[PickerOption]]
+
+
+class PickerRegistry:
+    """
+    Maps module types to pickers, functions returning the part options of a
+    module. Picking them goes through the pick cache.
+
+    Lookups follow the MRO of the module type, so a picker registered for a
+    base class also picks its subclasses. The resolution is cached per
+    concrete class, which makes dispatch a single dict lookup.
+    """
+
+    def __init__(self) -> None:
+        self.pickers: dict[type[Module], Picker] = {}
+        self.unpicked: Counter[type[Module]] = Counter()
+        self._resolved: dict[type[Module], Picker | None] = {}
+
+    def register(self, *types: type[Module]):
+        def decorator(
+            picker: Callable[[T], list[PickerOption]],
+        ) -> Callable[[T], list[PickerOption]]:
+            for t in types:
+                self.pickers[t] = picker
+            self._resolved.clear()
+            return picker
+
+        return decorator
+
+    def lookup(self, cls: type[Module]) -> Picker | None:
+        if cls not in self._resolved:
+            self._resolved[cls] = next(
+                (self.pickers[c] for c in cls.__mro__ if c in self.pickers), None
+            )
+        return self._resolved[cls]
+
+    def pick(self, module: Module) -> bool:
+        picker = self.lookup(type(module))
+        if picker is None:
+            self.unpicked[type(module)] += 1
+            return False
+
+        pick_cache.pick(module, picker(module))
+        return True
+
+    def report(self):
+        for t, count in self.unpicked.most_common():
+            logger.debug(f"No picker for {t.__name__} ({count} nodes)")
+
+
+picker_registry = PickerRegistry()
+
 # part pickers --------------------------------------------
 
 
-def pick_resistor(resistor: Resistor):
+@picker_registry.register(Resistor)
+def pick_resistor(resistor: Resistor) -> list[PickerOption]:
     """
     Link a partnumber/footprint to a Resistor
 
     Selects only 1% 0402 resistors
     """
 
-    pick_module_by_params(
-        resistor,
-        [
-            PickerOption(
-                part=LCSC_Part(partno="C25076"),
-                params={"resistance": Constant(100)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25087"),
-                params={"resistance": Constant(200)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C11702"),
-                params={"resistance": Constant(1e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25879"),
-                params={"resistance": Constant(2.2e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25900"),
-                params={"resistance": Constant(4.7e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25905"),
-                params={"resistance": Constant(5.1e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25917"),
-                params={"resistance": Constant(6.8e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25744"),
-                params={"resistance": Constant(10e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25752"),
-                params={"resistance": Constant(12e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25771"),
-                params={"resistance": Constant(27e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25741"),
-                params={"resistance": Constant(100e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25782"),
-                params={"resistance": Constant(390e3)},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C25790"),
-                params={"resistance": Constant(470e3)},
-            ),
-        ],
-    )
-
-
-def pick_led(module: LED):
-    pick_module_by_params(
-        module,
-        [
-            PickerOption(
-                part=LCSC_Part(partno="C965790"),
-                params={
-                    "color": Constant(LED.Color.RED),
-                    "max_brightness": Constant(300e-3),
-                    "forward_voltage": Constant(2.1),
-                    "max_current": Constant(20e-3),
-                },
-                pinmap={"1": module.IFs.cathode, "2": module.IFs.anode},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C2286"),
-                params={
-                    "color": Constant(LED.Color.GREEN),
-                    "max_brightness": Constant(285e-3),
-                    "forward_voltage": Constant(3.7),
-                    "max_current": Constant(100e-3),
-                },
-                pinmap={"1": module.IFs.cathode, "2": module.IFs.anode},
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C72041"),
-                params={
-                    "color": Constant(LED.Color.BLUE),
-                    "max_brightness": Constant(28.5e-3),
-                    "forward_voltage": Constant(3.1),
-                    "max_current": Constant(100e-3),
-                },
-                pinmap={"1": module.IFs.cathode, "2": module.IFs.anode},
-            ),
-        ],
-    )
-
-
-def pick_capacitor(module: Capacitor):
+    return [
+        PickerOption(
+            part=LCSC_Part(partno=RESISTOR_100R.partno),
+            params={"resistance": Constant(RESISTOR_100R.params["resistance"])},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25087"),
+            params={"resistance": Constant(200)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C11702"),
+            params={"resistance": Constant(1e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25879"),
+            params={"resistance": Constant(2.2e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25900"),
+            params={"resistance": Constant(4.7e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno=RESISTOR_5K1.partno),
+            params={"resistance": Constant(RESISTOR_5K1.params["resistance"])},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25917"),
+            params={"resistance": Constant(6.8e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25744"),
+            params={"resistance": Constant(10e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25752"),
+            params={"resistance": Constant(12e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25771"),
+            params={"resistance": Constant(27e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25741"),
+            params={"resistance": Constant(100e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25782"),
+            params={"resistance": Constant(390e3)},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C25790"),
+            params={"resistance": Constant(470e3)},
+        ),
+    ]
+
+
+@picker_registry.register(LED)
+def pick_led(module: LED) -> list[PickerOption]:
+    return [
+        PickerOption(
+            part=LCSC_Part(partno=LED_RED.partno),
+            params={
+                "color": Constant(LED.Color.RED),
+                **{k: Constant(v) for k, v in LED_RED.params.items()},
+            },
+            pinmap={"1": module.IFs.cathode, "2": module.IFs.anode},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C2286"),
+            params={
+                "color": Constant(LED.Color.GREEN),
+                "max_brightness": Constant(285e-3),
+                "forward_voltage": Constant(3.7),
+                "max_current": Constant(100e-3),
+            },
+            pinmap={"1": module.IFs.cathode, "2": module.IFs.anode},
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C72041"),
+            params={
+                "color": Constant(LED.Color.BLUE),
+                "max_brightness": Constant(28.5e-3),
+                "forward_voltage": Constant(3.1),
+                "max_current": Constant(100e-3),
+            },
+            pinmap={"1": module.IFs.cathode, "2": module.IFs.anode},
+        ),
+    ]
+
+
+@picker_registry.register(Capacitor)
+def pick_capacitor(module: Capacitor) -> list[PickerOption]:
     """
     Link a partnumber/footprint to a Capacitor
 
     Uses 0402 when possible
     """
 
-    pick_module_by_params(
-        module,
-        [
-            PickerOption(
-                part=LCSC_Part(partno="C1525"),
-                params={
-                    "temperature_coefficient": Constant(
-                        Capacitor.TemperatureCoefficient.X7R,
-                    ),
-                    "capacitance": Constant(100e-9),
-                    "rated_voltage": Constant(16),
-                },
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C19702"),
-                params={
-                    "temperature_coefficient": Constant(
-                        Capacitor.TemperatureCoefficient.X5R,
-                    ),
-                    "capacitance": Constant(10e-6),
-                    "rated_voltage": Constant(10),
-                },
-            ),
-        ],
-    )
-
-
-def pick_fuse(module: Fuse):
-    pick_module_by_params(
-        module,
-        [
-            PickerOption(
-                part=LCSC_Part(partno="C914087"),
-                params={
-                    "fuse_type": Constant(Fuse.FuseType.RESETTABLE),
-                    "response_type": Constant(Fuse.ResponseType.SLOW),
-                    "trip_current": Constant(1),
-                },
-            ),
-            PickerOption(
-                part=LCSC_Part(partno="C914085"),
-                params={
-                    "fuse_type": Constant(Fuse.FuseType.RESETTABLE),
-                    "response_type": Constant(Fuse.ResponseType.SLOW),
-                    "trip_current": Constant(0.5),
-                },
-            ),
-        ],
-    )
+    return [
+        PickerOption(
+            part=LCSC_Part(partno=CAPACITOR_100N.partno),
+            params={
+                "temperature_coefficient": Constant(
+                    Capacitor.TemperatureCoefficient.X7R,
+                ),
+                **{k: Constant(v) for k, v in CAPACITOR_100N.params.items()},
+            },
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C19702"),
+            params={
+                "temperature_coefficient": Constant(
+                    Capacitor.TemperatureCoefficient.X5R,
+                ),
+                "capacitance": Constant(10e-6),
+                "rated_voltage": Constant(10),
+            },
+        ),
+    ]
+
+
+@picker_registry.register(Fuse)
+def pick_fuse(module: Fuse) -> list[PickerOption]:
+    return [
+        PickerOption(
+            part=LCSC_Part(partno=FUSE_1A.partno),
+            params={
+                "fuse_type": Constant(Fuse.FuseType.RESETTABLE),
+                "response_type": Constant(Fuse.ResponseType.SLOW),
+                "trip_current": Constant(FUSE_1A.params["trip_current"]),
+            },
+        ),
+        PickerOption(
+            part=LCSC_Part(partno="C914085"),
+            params={
+                "fuse_type": Constant(Fuse.FuseType.RESETTABLE),
+                "response_type": Constant(Fuse.ResponseType.SLOW),
+                "trip_current": Constant(0.5),
+            },
+        ),
+    ]
+
+
+@picker_registry.register(USB_Type_C_Receptacle_16_pin)
+def pick_usb_c_receptacle(module: USB_Type_C_Receptacle_16_pin) -> list[PickerOption]:
+    return [
+        PickerOption(
+            part=LCSC_Part(partno=USB_C_RECEPTACLE_16P.partno),
+            pinmap={
+                "1": module.IFs.gnd[0],
+                "2": module.IFs.vbus[0],
+                "3": module.IFs.sbu2,
+                "4": module.IFs.cc1,
+                "5": module.IFs.d2.IFs.n,
+                "6": module.IFs.d1.IFs.p,
+                "7": module.IFs.d1.IFs.n,
+                "8": module.IFs.d2.IFs.p,
+                "9": module.IFs.cc2,
+                "10": module.IFs.sbu1,
+                "11": module.IFs.vbus[3],
+                "12": module.IFs.gnd[3],
+                "13": module.IFs.shield,
+                "14": module.IFs.shield,
+            },
+        ),
+    ]
 
 
 # ----------------------------------------------------------
 
 
 def pick(module: Module) -> bool:
-    # switch over all types of parts you want to assign real components to
-
-    if isinstance(module, Resistor):
-        pick_resistor(module)
-    elif isinstance(module, LED):
-        pick_led(module)
-    elif isinstance(module, Capacitor):
-        pick_capacitor(module)
-    elif isinstance(module, Fuse):
-        pick_fuse(module)
-    elif isinstance(module, USB_Type_C_Receptacle_16_pin):
-        pick_module_by_params(
-            module,
-            [
-                PickerOption(
-                    part=LCSC_Part(partno="C2765186"),
-                    pinmap={
-                        "1": module.IFs.gnd[0],
-                        "2": module.IFs.vbus[0],
-                        "3": module.IFs.sbu2,
-                        "4": module.IFs.cc1,
-                        "5": module.IFs.d2.IFs.n,
-                        "6": module.IFs.d1.IFs.p,
-                        "7": module.IFs.d1.IFs.n,
-                        "8": module.IFs.d2.IFs.p,
-                        "9": module.IFs.cc2,
-                        "10": module.IFs.sbu1,
-                        "11": module.IFs.vbus[3],
-                        "12": module.IFs.gnd[3],
-                        "13": module.IFs.shield,
-                        "14": module.IFs.shield,
-                    },
-                ),
-            ],
-        )
-    else:
-        return False
-
-    return True
+    return picker_registry.pick(module)
@@ -0,0 +1,121 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+SVG preview of a card, from the layout data only.
+
+Draws the card outline, the silkscreen text, the LED positions and where
+transform_pcb places the USB-C receptacle and the logo. No graph, no picking,
+no KiCad, so it is fast enough to redraw while typing.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from faebryk.libs.font import Font
+from pixelcard.board import (
+    CREDITCARD_CORNER_RADIUS,
+    CREDITCARD_HEIGHT,
+    CREDITCARD_WIDTH,
+    TEXT_BBOX,
+    TEXT_MARGIN,
+    TEXT_SIMPLIFY_TOLERANCE,
+    Placement,
+    get_logo_placement,
+    get_text_bottom,
+    get_usb_c_placement,
+)
+from pixelcard.libs.geometry import merge_polygons
+from pixelcard.libs.glyphs import text_layout
+
+# approximate footprint extents (w, h) in mm, unrotated
+USB_C_SIZE = (8.94, 7.3)
+LOGO_SIZE = (8.0, 9.0)
+LED_SIZE = (1.0, 0.5)
+
+
+@dataclass(frozen=True)
+class PreviewStyle:
+    board: str = "#1d5e2d"
+    silkscreen: str = "#f2f2f2"
+    led: str = "#ff3030"
+    footprint: str = "#d4a017"
+
+
+def _ring(coords) -> str:
+    points = [f"{x + TEXT_MARGIN:.3f},{y + TEXT_MARGIN:.3f}" for x, y in coords]
+    return "M" + " L".join(points) + " Z"
+
+
+def _footprint(name: str, placement: Placement, size, style: PreviewStyle) -> str:
+    x, y, rotation = placement
+    w, h = size
+    return (
+        f'<g transform="translate({x:.3f} {y:.3f}) rotate({rotation})">'
+        f'<rect x="{-w / 2:.3f}" y="{-h / 2:.3f}" width="{w}" height="{h}"'
+        f' fill="none" stroke="{style.footprint}" stroke-width="0.2"/>'
+        f'<text font-size="1.5" text-anchor="middle" dominant-baseline="middle"'
+        f' fill="{style.footprint}">{escape(name)}</text></g>'
+    )
+
+
+def render_svg(
+    led_text: str,
+    font: Font,
+    font_size: float = 20,
+    led_density: float = 0.13,
+    style: PreviewStyle = PreviewStyle(),
+) -> str:
+    layout = text_layout(
+        font=font,
+        text=led_text,
+        font_size=font_size,
+        density=led_density,
+        bbox=TEXT_BBOX,
+        scale_to_fit=False,
+    )
+    # same geometry transform_pcb turns into zones
+    polygons = merge_polygons(layout.polygons, TEXT_SIMPLIFY_TOLERANCE)
+
+    elements = [
+        f'<rect width="{CREDITCARD_WIDTH}" height="{CREDITCARD_HEIGHT}"'
+        f' rx="{CREDITCARD_CORNER_RADIUS}" fill="{style.board}"/>'
+    ]
+
+    path = " ".join(
+        _ring(ring.coords) for p in polygons for ring in [p.exterior, *p.interiors]
+    )
+    elements.append(f'<path d="{path}" fill="{style.silkscreen}" fill-rule="evenodd"/>')
+
+    w, h = LED_SIZE
+    elements += [
+        f'<rect x="{x + TEXT_MARGIN - w / 2:.3f}" y="{y + TEXT_MARGIN - h / 2:.3f}"'
+        f' width="{w}" height="{h}" fill="{style.led}"/>'
+        for x, y in layout.leds
+    ]
+
+    if polygons:
+        text_bottom = get_text_bottom(polygons)
+        elements.append(
+            _footprint("USB-C", get_usb_c_placement(text_bottom), USB_C_SIZE, style)
+        )
+        elements.append(
+            _footprint("logo", get_logo_placement(text_bottom), LOGO_SIZE, style)
+        )
+
+    return "\n".join(
+        [
+            '<svg xmlns="http://www.w3.org/2000/svg"'
+            f' width="{CREDITCARD_WIDTH}mm" height="{CREDITCARD_HEIGHT}mm"'
+            f' viewBox="0 0 {CREDITCARD_WIDTH} {CREDITCARD_HEIGHT}">',
+            *elements,
+            "</svg>",
+        ]
+    )
+
+
+def write_preview(out: Path, led_text: str, font: Font, **kwargs) -> Path:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(render_svg(led_text, font, **kwargs))
+    return out
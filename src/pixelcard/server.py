@@ -0,0 +1,459 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Long running card generator.
+
+The server keeps a pool of batch workers alive, each with faebryk imported,
+the font loaded and the part library set up, so a card request only pays for
+building the card. Jobs are built in the worker processes, a crashing build
+cannot take the server down.
+
+HTTP API (json):
+    POST /jobs            {"led_text", "contact_info", "export_artifacts"}
+                          -> 202 {"id", ...}
+    GET  /jobs/<id>       state, output directory, artifacts, latency
+    GET  /jobs/<id>/zip   zip of the output directory
+    GET  /metrics         queue depth, job counts, latency percentiles
+
+Finished jobs are kept for --job-ttl seconds and at most --max-jobs of them,
+evicted jobs lose their output directory and zip. Job ids (and with them the
+output directories) are unique across server restarts.
+
+> python -m pixelcard.server serve --jobs 4
+> python -m pixelcard.server submit "PixelCard" "me@example.com" --zip card.zip
+> python -m pixelcard.server loadtest --requests 50 --concurrency 8
+"""
+
+import json
+import logging
+import shutil
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from multiprocessing import Manager
+from pathlib import Path
+
+import typer
+
+logger = logging.getLogger(__name__)
+
+app = typer.Typer()
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+
+@dataclass
+class Job:
+    id: str
+    led_text: str
+    contact_info: str
+    export_artifacts: bool
+    out_dir: Path
+    submitted: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+    future: Future | None = None
+    error: str | None = None
+
+    @property
+    def state(self) -> str:
+        if self.finished is not None:
+            return "failed" if self.error else "done"
+        if self.future is not None and self.future.running():
+            return "running"
+        return "queued"
+
+    @property
+    def latency(self) -> float | None:
+        return None if self.finished is None else self.finished - self.submitted
+
+    def to_json(self) -> dict:
+        artifacts = []
+        if self.state == "done":
+            artifacts = sorted(
+                p.relative_to(self.out_dir).as_posix()
+                for p in self.out_dir.rglob("*")
+                if p.is_file()
+            )
+        return {
+            "id": self.id,
+            "state": self.state,
+            "led_text": self.led_text,
+            "out_dir": str(self.out_dir.resolve()),
+            "artifacts": artifacts,
+            "error": self.error,
+            "latency_s": self.latency,
+        }
+
+
+class CardService:
+    """
+    Job bookkeeping around a warm ProcessPoolExecutor of batch workers.
+    """
+
+    def __init__(
+        self,
+        build_dir: Path,
+        out_dir: Path,
+        jobs: int,
+        history: int = 1000,
+        max_jobs: int = 1000,
+        job_ttl: float = 3600,
+    ) -> None:
+        """
+        history: number of latencies kept for the metrics
+        max_jobs: finished jobs kept at most, oldest are evicted first
+        job_ttl: seconds a finished job is kept
+        """
+
+        from pixelcard.main import fetch_font
+
+        self.build_dir = build_dir
+        self.out_dir = out_dir
+        self.workers = jobs
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+
+        self.jobs: dict[str, Job] = {}
+        self.latencies: deque[float] = deque(maxlen=history)
+        # job ids are <run>-<index>, the run tells the server starts apart
+        self._run = uuid.uuid4().hex[:8]
+        self._ids = count()
+        self._lock = threading.Lock()
+        self._zip_lock = threading.Lock()
+
+        # fetch the font once here, not in every worker
+        fetch_font(build_dir)
+        self.pool = self._start_pool()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        from pixelcard.batch import _init_worker, _worker_ready
+
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.build_dir, False),
+        )
+        # start and initialize all workers now, not on the first requests:
+        # every ready task blocks until all workers run one, so each worker
+        # has to be up (and through its initializer) for any of them to return
+        with Manager() as manager:
+            barrier = manager.Barrier(self.workers)
+            futures = [pool.submit(_worker_ready, barrier) for _ in range(self.workers)]
+            pids = {future.result() for future in futures}
+        assert len(pids) == self.workers, pids
+        logger.info(f"{self.workers} workers ready")
+        return pool
+
+    def _evict(self):
+        """
+        Drop finished jobs past their TTL or beyond max_jobs, with their
+        outputs. Called with the lock held.
+        """
+
+        now = time.perf_counter()
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished is not None),
+            key=lambda job: job.finished,  # type: ignore
+        )
+        expired = [
+            job
+            for job in finished
+            if now - job.finished > self.job_ttl  # type: ignore
+        ]
+        overflow = len(finished) - len(expired) - self.max_jobs
+        if overflow > 0:
+            expired += finished[len(expired) : len(expired) + overflow]
+
+        for job in expired:
+            del self.jobs[job.id]
+            job.out_dir.with_suffix(".zip").unlink(missing_ok=True)
+            shutil.rmtree(job.out_dir, ignore_errors=True)
+        if expired:
+            logger.debug(f"Evicted {len(expired)} finished jobs")
+
+    def submit(self, led_text: str, contact_info: str, export_artifacts: bool) -> Job:
+        from pixelcard.batch import CardRow, _build_row
+
+        with self._lock:
+            self._evict()
+            index = next(self._ids)
+            row = CardRow(index=index, led_text=led_text, contact_info=contact_info)
+            job_id = f"{self._run}-{index:06d}"
+            job = Job(
+                id=job_id,
+                led_text=led_text,
+                contact_info=contact_info,
+                export_artifacts=export_artifacts,
+                out_dir=self.out_dir.joinpath(job_id),
+            )
+            self.jobs[job.id] = job
+            try:
+                job.future = self.pool.submit(
+                    _build_row, row, job.out_dir, export_artifacts
+                )
+            except BrokenProcessPool:
+                # a worker died (e.g killed by the OOM killer), start over
+                logger.error("Worker pool broken, restarting")
+                self.pool = self._start_pool()
+                job.future = self.pool.submit(
+                    _build_row, row, job.out_dir, export_artifacts
+                )
+        job.future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def _finish(self, job: Job, future: Future):
+        try:
+            job.error = future.result().error
+        except BrokenProcessPool:
+            job.error = "worker crashed"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+        job.finished = time.perf_counter()
+        self.latencies.append(job.latency)  # type: ignore
+        logger.info(f"Job {job.id} {job.state} in {job.latency:.2f}s")
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def zip(self, job: Job) -> Path:
+        """
+        Zip of the output directory, created once. Requests for the same job
+        wait for it instead of writing the same archive concurrently.
+        """
+
+        archive = job.out_dir.with_suffix(".zip")
+        with self._zip_lock:
+            if not archive.exists():
+                tmp = job.out_dir.with_name(f"{job.out_dir.name}.tmp")
+                Path(shutil.make_archive(str(tmp), "zip", job.out_dir)).replace(archive)
+        return archive
+
+    def metrics(self) -> dict:
+        with self._lock:
+            states = [job.state for job in self.jobs.values()]
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float | None:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "workers": self.workers,
+            "queue_depth": states.count("queued"),
+            "running": states.count("running"),
+            "done": states.count("done"),
+            "failed": states.count("failed"),
+            "latency_s": {
+                "count": len(latencies),
+                "mean": statistics.fmean(latencies) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _handler(service: CardService) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, data: dict, status: HTTPStatus = HTTPStatus.OK):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: HTTPStatus, message: str):
+            self._send_json({"error": message}, status)
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self._error(HTTPStatus.NOT_FOUND, "unknown path")
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                led_text = str(request["led_text"])
+            except (ValueError, KeyError, TypeError) as e:
+                return self._error(HTTPStatus.BAD_REQUEST, f"invalid job: {e}")
+
+            job = service.submit(
+                led_text,
+                str(request.get("contact_info", "")),
+                bool(request.get("export_artifacts", False)),
+            )
+            self._send_json(job.to_json(), HTTPStatus.ACCEPTED)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                return self._send_json(service.metrics())
+
+            parts = self.path.strip("/").split("/")
+            job = service.get(parts[1]) if len(parts) >= 2 else None
+            if parts[0] != "jobs" or job is None:
+                return self._error(HTTPStatus.NOT_FOUND, "unknown job")
+
+            if parts[2:] == []:
+                return self._send_json(job.to_json())
+            if parts[2:] != ["zip"]:
+                return self._error(HTTPStatus.NOT_FOUND, "unknown path")
+            if job.state != "done":
+                return self._error(HTTPStatus.CONFLICT, f"job is {job.state}")
+
+            archive = service.zip(job)
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(archive.stat().st_size))
+            self.end_headers()
+            with archive.open("rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Address to listen on"),
+    port: int = typer.Option(8765, help="Port to listen on"),
+    jobs: int = typer.Option(2, help="Number of worker processes"),
+    out_dir: Path = typer.Option(
+        Path("./build/server"), help="Directory for the per-job outputs"
+    ),
+    max_jobs: int = typer.Option(1000, help="Finished jobs to keep at most"),
+    job_ttl: float = typer.Option(3600, help="Seconds to keep a finished job"),
+):
+    service = CardService(
+        Path("./build"), out_dir, jobs, max_jobs=max_jobs, job_ttl=job_ttl
+    )
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    logger.info(f"Serving on http://{host}:{port} with {jobs} warm workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+# client ---------------------------------------------------
+
+
+def _request(url: str, data: dict | None = None) -> dict:
+    body = None if data is None else json.dumps(data).encode()
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"{url}: {e.code} {e.read().decode()}") from e
+
+
+def build_remote(
+    led_text: str,
+    contact_info: str,
+    url: str = DEFAULT_URL,
+    export_artifacts: bool = False,
+    poll_interval: float = 0.2,
+) -> dict:
+    """
+    Submit a job and wait for it to finish. Returns the final job state.
+    """
+
+    job = _request(
+        f"{url}/jobs",
+        {
+            "led_text": led_text,
+            "contact_info": contact_info,
+            "export_artifacts": export_artifacts,
+        },
+    )
+    while job["state"] in ["queued", "running"]:
+        time.sleep(poll_interval)
+        job = _request(f"{url}/jobs/{job['id']}")
+    return job
+
+
+@app.command()
+def submit(
+    led_text: str = typer.Argument(..., help="Text to convert into LEDText."),
+    contact_info: str = typer.Argument("", help="Your contact information."),
+    url: str = typer.Option(DEFAULT_URL, help="Server url"),
+    export_artifacts: bool = typer.Option(False, help="Export PCBA artifacts"),
+    zip_path: Path | None = typer.Option(
+        None, "--zip", help="Download the outputs as zip"
+    ),
+):
+    job = build_remote(led_text, contact_info, url, export_artifacts)
+    if job["state"] != "done":
+        logger.error(f"Job {job['id']} failed: {job['error']}")
+        raise typer.Exit(1)
+
+    logger.info(f"Job {job['id']} done in {job['latency_s']:.2f}s: {job['out_dir']}")
+    for artifact in job["artifacts"]:
+        logger.info(f"  {artifact}")
+
+    if zip_path is not None:
+        urllib.request.urlretrieve(f"{url}/jobs/{job['id']}/zip", zip_path)
+        logger.info(f"Outputs written to {zip_path}")
+
+
+@app.command()
+def loadtest(
+    url: str = typer.Option(DEFAULT_URL, help="Server url"),
+    requests: int = typer.Option(20, help="Number of jobs"),
+    concurrency: int = typer.Option(4, help="Concurrent clients"),
+    led_text: str = typer.Option("PixelCard", help="Text of the cards"),
+):
+    def one(i: int) -> tuple[float, bool]:
+        start = time.perf_counter()
+        job = build_remote(f"{led_text} {i}", "Load test", url)
+        return time.perf_counter() - start, job["state"] == "done"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    duration = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    failed = sum(not ok for _, ok in results)
+    logger.info(
+        f"{requests} jobs in {duration:.1f}s ({requests / duration:.2f} jobs/s),"
+        f" {failed} failed"
+    )
+    logger.info(
+        f"client latency: p50 {latencies[len(latencies) // 2]:.2f}s"
+        f" p95 {latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]:.2f}s"
+        f" max {latencies[-1]:.2f}s"
+    )
+    logger.info(f"server metrics: {json.dumps(_request(f'{url}/metrics'))}")
+
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    from faebryk.libs.logging import setup_basic_logging
+
+    setup_basic_logging()
+    app()
@@ -0,0 +1,85 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from pathlib import Path
+
+import pytest
+from pixelcard.batch import CardRow, read_rows
+
+
+def write(tmp_path: Path, name: str, text: str) -> Path:
+    path = tmp_path.joinpath(name)
+    path.write_text(text)
+    return path
+
+
+def test_csv(tmp_path: Path):
+    rows_file = write(
+        tmp_path,
+        "rows.csv",
+        "led_text,contact_info\n"
+        'PixelCard,"me@example.com, +1 555"\n'
+        "Pi\n"
+        '"two\nlines",x\n',
+    )
+
+    assert read_rows(rows_file) == [
+        CardRow(0, "PixelCard", "me@example.com, +1 555"),
+        CardRow(1, "Pi", ""),
+        CardRow(2, "two\nlines", "x"),
+    ]
+
+
+def test_jsonl(tmp_path: Path):
+    rows_file = write(
+        tmp_path,
+        "rows.jsonl",
+        '{"led_text": "PixelCard", "contact_info": "me"}\n\n{"led_text": "Pi"}\n',
+    )
+
+    assert read_rows(rows_file) == [
+        CardRow(0, "PixelCard", "me"),
+        CardRow(1, "Pi", ""),
+    ]
+
+
+def test_csv_errors_with_line_numbers(tmp_path: Path):
+    rows_file = write(
+        tmp_path,
+        "rows.csv",
+        'led_text,contact_info\nPixelCard,me\n,me\n"mul\nti",x\n   ,y\n',
+    )
+
+    with pytest.raises(ValueError) as e:
+        read_rows(rows_file)
+    # line numbers of the physical lines, also after a multi-line field
+    assert str(e.value).splitlines() == [
+        f"{rows_file}:3: missing led_text",
+        f"{rows_file}:6: missing led_text",
+    ]
+
+
+def test_jsonl_errors_with_line_numbers(tmp_path: Path):
+    rows_file = write(
+        tmp_path,
+        "rows.jsonl",
+        '{"led_text": "Pi"}\n'
+        "{broken\n"
+        "\n"
+        '["led_text"]\n'
+        '{"contact_info": "me"}\n'
+        '{"led_text": "Pi", "contact_info": 5}\n',
+    )
+
+    with pytest.raises(ValueError) as e:
+        read_rows(rows_file)
+    lines = str(e.value).splitlines()
+    assert [line.split(": ", 1)[0] for line in lines] == [
+        f"{rows_file}:{n}" for n in [2, 4, 5, 6]
+    ]
+    assert "invalid JSON" in lines[0]
+    assert lines[1:] == [
+        f"{rows_file}:4: expected an object",
+        f"{rows_file}:5: missing led_text",
+        f"{rows_file}:6: contact_info is not a string",
+    ]
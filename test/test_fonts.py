@@ -0,0 +1,212 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import io
+import os
+import sys
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pixelcard.libs.fonts import FontError, FontProvider, FontSource
+
+NAME = "Font-Regular.ttf"
+FONT = b"the real font"
+SHA256 = hashlib.sha256(FONT).hexdigest()
+SOURCE = FontSource(NAME, "https://fonts.invalid/font.zip", SHA256)
+
+
+def write_zip(path: Path, files: dict[str, bytes]):
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, data in files.items():
+            zip_ref.writestr(name, data)
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """
+    Fake requests module, records the requested urls and serves served[url].
+    """
+
+    requested: list[str] = []
+    served: dict[str, bytes] = {}
+
+    class RequestException(Exception): ...
+
+    class Response:
+        def __init__(self, url: str):
+            self.url = url
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            if self.url not in served:
+                raise RequestException(f"404 {self.url}")
+
+        def iter_content(self, chunk_size: int):
+            yield served[self.url]
+
+    def get(url: str, stream: bool, timeout: float):
+        requested.append(url)
+        return Response(url)
+
+    monkeypatch.setitem(
+        sys.modules,
+        "requests",
+        SimpleNamespace(get=get, RequestException=RequestException),
+    )
+    return SimpleNamespace(requested=requested, served=served)
+
+
+def provider(tmp_path: Path, *mirrors: Path, **kwargs) -> FontProvider:
+    return FontProvider(tmp_path.joinpath("cache"), list(mirrors), retries=1, **kwargs)
+
+
+def mirror(tmp_path: Path, name: str) -> Path:
+    path = tmp_path.joinpath(name)
+    path.mkdir()
+    return path
+
+
+def test_cache_first(tmp_path: Path, downloads):
+    cached = tmp_path.joinpath("cache", SHA256, NAME)
+    cached.parent.mkdir(parents=True)
+    cached.write_bytes(FONT)
+    legacy = tmp_path.joinpath("cache", NAME)
+    legacy.write_bytes(FONT)
+
+    assert provider(tmp_path).get(SOURCE) == cached
+    assert legacy.exists()
+    assert downloads.requested == []
+
+
+def test_legacy_cache_before_mirrors(tmp_path: Path, downloads):
+    legacy = tmp_path.joinpath("cache", NAME)
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(FONT)
+    m = mirror(tmp_path, "m")
+    m.joinpath(NAME).write_bytes(FONT)
+
+    path = provider(tmp_path, m).get(SOURCE)
+    assert path == tmp_path.joinpath("cache", SHA256, NAME)
+    assert path.read_bytes() == FONT
+    # moved into its slot
+    assert not legacy.exists()
+    assert m.joinpath(NAME).exists()
+    assert downloads.requested == []
+
+
+def test_mirrors_in_order_ttf_before_zip(tmp_path: Path, downloads, caplog):
+    first, second = mirror(tmp_path, "first"), mirror(tmp_path, "second")
+    write_zip(first.joinpath("fonts.zip"), {NAME: FONT})
+    first.joinpath(NAME).write_bytes(FONT)
+    second.joinpath(NAME).write_bytes(FONT)
+
+    with caplog.at_level("INFO"):
+        path = provider(tmp_path, first, second).get(SOURCE)
+    assert path.read_bytes() == FONT
+    assert f"from mirror {first}" in caplog.text
+    assert "fonts.zip" not in caplog.text
+    assert str(second) not in caplog.text
+    # mirrors are only copied from
+    assert first.joinpath(NAME).exists()
+    assert downloads.requested == []
+
+
+def test_mismatching_and_corrupt_sources_are_skipped(tmp_path: Path, downloads):
+    legacy = tmp_path.joinpath("cache", NAME)
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"tampered")
+    m = mirror(tmp_path, "m")
+    m.joinpath(NAME).write_bytes(b"other version")
+    m.joinpath("a_corrupt.zip").write_bytes(b"not a zip")
+    write_zip(m.joinpath("b_other.zip"), {"Other.ttf": FONT})
+    write_zip(m.joinpath("c_font.zip"), {NAME: FONT})
+
+    path = provider(tmp_path, m).get(SOURCE)
+    assert path.read_bytes() == FONT
+    assert downloads.requested == []
+
+
+def test_download_last(tmp_path: Path, downloads):
+    m = mirror(tmp_path, "m")
+    m.joinpath(NAME).write_bytes(b"other version")
+    archive = io.BytesIO()
+    write_zip(archive, {NAME: FONT})
+    downloads.served[SOURCE.url] = archive.getvalue()
+
+    path = provider(tmp_path, m).get(SOURCE)
+    assert path.read_bytes() == FONT
+    assert downloads.requested == [SOURCE.url]
+
+    # cached from now on
+    assert provider(tmp_path).get(SOURCE) == path
+    assert downloads.requested == [SOURCE.url]
+
+
+def test_no_source(tmp_path: Path, downloads):
+    with pytest.raises(FontError):
+        provider(tmp_path).get(SOURCE)
+    assert downloads.requested == [SOURCE.url]
+
+
+def test_unpinned_local_copies(tmp_path: Path, downloads):
+    source = FontSource(NAME, SOURCE.url)
+    legacy = tmp_path.joinpath("cache", NAME)
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(FONT)
+
+    path = provider(tmp_path).get(source)
+    assert path == tmp_path.joinpath("cache", SHA256, NAME)
+    assert not legacy.exists()
+    # found in its slot from now on
+    assert provider(tmp_path).get(source) == path
+
+    m = mirror(tmp_path, "m")
+    m.joinpath(NAME).write_bytes(FONT)
+    other = tmp_path.joinpath("other")
+    assert provider(other, m).get(source).read_bytes() == FONT
+    assert downloads.requested == []
+
+
+def test_unpinned_download(tmp_path: Path, downloads):
+    source = FontSource(NAME, SOURCE.url)
+    archive = io.BytesIO()
+    write_zip(archive, {NAME: FONT})
+    downloads.served[SOURCE.url] = archive.getvalue()
+
+    with pytest.raises(FontError):
+        provider(tmp_path).get(source)
+    assert downloads.requested == []
+
+    path = provider(tmp_path, allow_unpinned=True).get(source)
+    assert path.read_bytes() == FONT
+    assert provider(tmp_path).get(source) == path
+    assert downloads.requested == [SOURCE.url]
+
+
+def test_unpinned_skips_damaged_slots(tmp_path: Path, downloads):
+    source = FontSource(NAME, SOURCE.url)
+    good = tmp_path.joinpath("cache", SHA256, NAME)
+    good.parent.mkdir(parents=True)
+    good.write_bytes(FONT)
+    damaged = tmp_path.joinpath("cache", "0" * 64, NAME)
+    damaged.parent.mkdir(parents=True)
+    damaged.write_bytes(b"damaged")
+
+    assert provider(tmp_path).get(source) == good
+
+
+def test_default_reads_mirrors_from_env(tmp_path: Path, monkeypatch):
+    a, b = tmp_path.joinpath("a"), tmp_path.joinpath("b")
+    monkeypatch.setenv("PIXELCARD_FONT_MIRROR", f"{a}{os.pathsep}{b}")
+    monkeypatch.delenv("PIXELCARD_FONT_ALLOW_UNPINNED", raising=False)
+    font_provider = FontProvider.default(tmp_path)
+    assert font_provider.mirrors == [a, b]
+    assert not font_provider.allow_unpinned
@@ -0,0 +1,66 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import pytest
+from pixelcard.libs.geometry import Point2D, fracture, merge_polygons
+from shapely.geometry import Polygon, box
+
+
+def shoelace(ring: list[Point2D]) -> float:
+    return (
+        sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]))
+        / 2
+    )
+
+
+def test_merge_touching_and_overlapping():
+    polygons = [box(0, 0, 1, 1), box(1, 0, 2, 1), box(1.5, 0.5, 3, 1.5)]
+    merged = merge_polygons(polygons, tolerance=0.01)
+    assert len(merged) == 1
+    assert merged[0].area == pytest.approx(2 + 1.5 * 1 - 0.5 * 0.5)
+
+
+def test_merge_keeps_separate_shapes_and_holes():
+    ring = box(0, 0, 3, 3).difference(box(1, 1, 2, 2))
+    merged = merge_polygons([ring, box(5, 0, 6, 1)], tolerance=0.01)
+    assert len(merged) == 2
+    assert sorted(len(p.interiors) for p in merged) == [0, 1]
+
+
+def test_merge_orients_and_simplifies():
+    # clockwise, with a redundant vertex on the bottom edge
+    square = Polygon([(0, 0), (0, 1), (1, 1), (1, 0), (0.5, 0.001)])
+    (merged,) = merge_polygons([square], tolerance=0.01)
+    assert merged.exterior.is_ccw
+    assert len(merged.exterior.coords) == 5
+
+
+def test_merge_nothing():
+    assert merge_polygons([], tolerance=0.01) == []
+
+
+def test_fracture_without_holes():
+    polygon = box(0, 0, 2, 1)
+    assert fracture(polygon) == list(polygon.exterior.coords)[:-1]
+
+
+@pytest.mark.parametrize(
+    "holes",
+    [
+        [box(1, 1, 2, 2)],
+        [box(1, 1, 2, 2), box(3, 1, 4, 2), box(5, 1, 6, 2)],
+        # one hole right of another, the slit of the 2nd crosses none
+        [box(1, 1, 2, 3), box(3, 0.5, 4, 1.5)],
+    ],
+)
+def test_fracture_encloses_the_polygon_area(holes: list[Polygon]):
+    polygon = box(0, 0, 7, 4)
+    for hole in holes:
+        polygon = polygon.difference(hole)
+    (polygon,) = merge_polygons([polygon], tolerance=0)
+
+    ring = fracture(polygon)
+    assert shoelace(ring) == pytest.approx(polygon.area)
+    # every hole vertex is on the ring, i.e no hole got lost
+    for hole in polygon.interiors:
+        assert set(hole.coords) <= set(ring)
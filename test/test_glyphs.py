@@ -0,0 +1,130 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+pytest.importorskip("faebryk")
+pytest.importorskip("fontTools")
+
+import numpy as np  # noqa: E402
+from faebryk.exporters.pcb.layout.font import FontLayout  # noqa: E402
+from faebryk.libs.font import Font  # noqa: E402
+from fontTools.fontBuilder import FontBuilder  # noqa: E402
+from fontTools.pens.ttGlyphPen import TTGlyphPen  # noqa: E402
+from pixelcard.libs.glyphs import GlyphCache, text_layout  # noqa: E402
+from shapely.geometry import Point  # noqa: E402
+
+Rect = tuple[int, int, int, int]
+
+# name: (char, advance, rectangles), one contour per rectangle
+GLYPHS: dict[str, tuple[str, int, list[Rect]]] = {
+    "I": ("I", 400, [(100, 0, 300, 700)]),
+    # a hole
+    "O": ("O", 700, [(50, 0, 650, 700), (200, 150, 500, 550)]),
+    # a hole with an island, flattened in three passes
+    "B": ("B", 800, [(50, 0, 750, 700), (150, 100, 650, 600), (300, 250, 500, 450)]),
+    "space": (" ", 300, []),
+    # reaches into the glyph after it
+    "W": ("W", 100, [(0, 0, 900, 700)]),
+    "period": (".", 300, [(100, 200, 200, 300)]),
+}
+
+
+def rect_glyph(rects: list[Rect]):
+    pen = TTGlyphPen(None)
+    for i, (x0, y0, x1, y1) in enumerate(rects):
+        # holes run the other way
+        points = [(x0, y0), (x0, y1), (x1, y1), (x1, y0)]
+        if i % 2:
+            points.reverse()
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+    return pen.glyph()
+
+
+@pytest.fixture(scope="module")
+def font(tmp_path_factory) -> Font:
+    path = tmp_path_factory.mktemp("font").joinpath("Test-Regular.ttf")
+
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder([".notdef", *GLYPHS])
+    builder.setupCharacterMap({ord(c): name for name, (c, _, _) in GLYPHS.items()})
+    builder.setupGlyf(
+        {".notdef": rect_glyph([])}
+        | {name: rect_glyph(rects) for name, (_, _, rects) in GLYPHS.items()}
+    )
+    builder.setupHorizontalMetrics(
+        {".notdef": (500, 0)}
+        | {name: (advance, 0) for name, (_, advance, _) in GLYPHS.items()}
+    )
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": "Test", "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    builder.save(str(path))
+
+    return Font(path)
+
+
+def coords(polygons) -> list[list[tuple[float, float]]]:
+    return [list(polygon.exterior.coords) for polygon in polygons]
+
+
+@pytest.mark.parametrize(
+    "text, bbox, scale_to_fit",
+    [
+        ("OIB", None, False),
+        ("B O I B", None, False),
+        # cut off by the bbox
+        ("IOIOIOIOIO", (40, 20), False),
+        ("BOB", (40, 20), True),
+    ],
+)
+def test_polygons_equal_string_to_polygons(font: Font, text, bbox, scale_to_fit):
+    composed = GlyphCache(font).polygons(text, 20, bbox, scale_to_fit)
+
+    assert composed is not None
+    assert coords(p for _, p in composed) == coords(
+        font.string_to_polygons(text, 20, bbox=bbox, scale_to_fit=scale_to_fit)
+    )
+
+
+def test_nested_glyphs_render_whole(font: Font):
+    assert GlyphCache(font).polygons("W.", 20, None, False) is None
+
+    # one LED per polygon, faebryk can not relax more in the polygon the dot is
+    # cut into
+    layout = text_layout(font, "W.", 20, density=1e-6)
+    assert coords(layout.polygons) == coords(font.string_to_polygons("W.", 20))
+    assert len(layout.leds) == FontLayout(font, 20, "W.", density=1e-6).get_count()
+
+
+def test_leds(font: Font):
+    np.random.seed(0)
+    layout = text_layout(font, "OIOIO", 20, density=0.05)
+
+    assert len(layout.leds) == FontLayout(font, 20, "OIOIO", density=0.05).get_count()
+    assert all(
+        any(polygon.buffer(1e-9).contains(Point(led)) for polygon in layout.polygons)
+        for led in layout.leds
+    )
+
+    # every O gets the same pattern, moved to its place
+    o_leds = [
+        sorted((x - polygon.bounds[0], y - polygon.bounds[1]) for x, y in leds)
+        for polygon, leds in zip(layout.polygons, split(layout))
+        if polygon.bounds[2] - polygon.bounds[0] > 10
+    ]
+    assert len(o_leds) == 3
+    assert all(np.allclose(leds, o_leds[0]) for leds in o_leds)
+
+
+def split(layout) -> list[list[tuple[float, float]]]:
+    leds = [
+        [led for led in layout.leds if polygon.buffer(1e-9).contains(Point(led))]
+        for polygon in layout.polygons
+    ]
+    assert sum(map(len, leds)) == len(layout.leds)
+    return leds
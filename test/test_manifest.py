@@ -0,0 +1,86 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from pathlib import Path
+
+from pixelcard.libs.manifest import (
+    StageManifest,
+    file_digest,
+    fingerprint,
+    source_digest,
+)
+
+
+def test_fingerprint():
+    assert fingerprint("a", 1) == fingerprint("a", 1)
+    assert fingerprint("a", 1) != fingerprint("a", 2)
+    assert fingerprint({"x": 1, "y": 2}) == fingerprint({"y": 2, "x": 1})
+    assert fingerprint(Path("a")) == fingerprint("a")
+
+
+def test_file_digest(tmp_path: Path):
+    file = tmp_path.joinpath("dir", "a.txt")
+    assert file_digest(file) is None
+
+    file.parent.mkdir()
+    file.write_text("a")
+    digest, dir_digest = file_digest(file), file_digest(file.parent)
+    assert digest is not None and dir_digest is not None
+
+    file.write_text("b")
+    assert file_digest(file) != digest
+    assert file_digest(file.parent) != dir_digest
+
+    file.write_text("a")
+    assert file_digest(file.parent) == dir_digest
+    file.parent.joinpath("b.txt").write_text("")
+    assert file_digest(file.parent) != dir_digest
+
+
+def test_source_digest_ignores_non_python(tmp_path: Path):
+    tmp_path.joinpath("a.py").write_text("x = 1")
+    digest = source_digest(tmp_path)
+    tmp_path.joinpath("notes.txt").write_text("")
+    assert source_digest(tmp_path) == digest
+    tmp_path.joinpath("a.py").write_text("x = 2")
+    assert source_digest(tmp_path) != digest
+
+
+def test_stage_freshness(tmp_path: Path):
+    path = tmp_path.joinpath("manifest.json")
+    output = tmp_path.joinpath("out.net")
+    output.write_text("netlist")
+
+    manifest = StageManifest(path)
+    assert not manifest.is_fresh("design", "inputs")
+    manifest.record("design", "inputs", [output])
+
+    # survives a reload
+    manifest = StageManifest(path)
+    assert manifest.is_fresh("design", "inputs")
+    assert not manifest.is_fresh("design", "other inputs")
+    assert not manifest.is_fresh("export", "inputs")
+
+    # outputs touched after the run
+    output.write_text("edited")
+    assert not manifest.outputs_intact("design")
+    assert not manifest.is_fresh("design", "inputs")
+    output.unlink()
+    assert not manifest.is_fresh("design", "inputs")
+
+
+def test_invalidate(tmp_path: Path):
+    path = tmp_path.joinpath("manifest.json")
+    manifest = StageManifest(path)
+    manifest.record("design", "a", [])
+    manifest.record("export", "b", [])
+    manifest.invalidate("export", "unknown")
+    assert StageManifest(path).stages.keys() == {"design"}
+
+
+def test_corrupt_manifest_is_ignored(tmp_path: Path):
+    path = tmp_path.joinpath("manifest.json")
+    path.write_text("{not json")
+    manifest = StageManifest(path)
+    assert manifest.stages == {}
+    assert not manifest.is_fresh("design", "a")
@@ -0,0 +1,42 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+pytest.importorskip("faebryk")
+
+from faebryk.core.core import Module, ModuleInterface  # noqa: E402
+from faebryk.core.util import get_all_nodes, get_first_child_of_type  # noqa: E402
+from pixelcard.libs.node_index import NodeIndex  # noqa: E402
+from pixelcard.modules.USB_C_5V_PSU_16p_Receptical import (  # noqa: E402
+    USB_C_5V_PSU_16p_Receptical,
+)
+
+
+@pytest.fixture(scope="module")
+def psu():
+    return USB_C_5V_PSU_16p_Receptical()
+
+
+def test_first_of_type_matches_get_first_child_of_type(psu):
+    index = NodeIndex(psu)
+    nodes = get_all_nodes(psu)
+    types = {type(node) for node in nodes} | {Module, ModuleInterface}
+
+    for root in [psu, *[n for n in nodes if isinstance(n, Module)]]:
+        for t in types:
+            try:
+                expected = get_first_child_of_type(root, t)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    index.first_of_type(t, within=root)
+                continue
+            assert index.first_of_type(t, within=root) is expected
+
+
+def test_of_type_includes_subclasses(psu):
+    index = NodeIndex(psu)
+    nodes = [psu, *get_all_nodes(psu)]
+
+    assert index.of_type(Module) == [n for n in nodes if isinstance(n, Module)]
+    assert NodeIndex(psu)._by_type.keys() == {type(n) for n in nodes}
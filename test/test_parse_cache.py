@@ -0,0 +1,97 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+from pathlib import Path
+
+from pixelcard.libs.parse_cache import ParseCache
+
+
+def parse(text: str) -> list[str]:
+    return text.split()
+
+
+def fail(text: str) -> list[str]:
+    raise AssertionError("parsed despite a cache hit")
+
+
+def write(path: Path, text: str, mtime_ns: int | None = None) -> Path:
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_load_hits_after_miss(tmp_path: Path):
+    cache = ParseCache(tmp_path.joinpath("cache"), "test")
+    board = write(tmp_path.joinpath("board"), "a b")
+
+    assert cache.load(board, parse) == ["a", "b"]
+    assert cache.load(board, fail) == ["a", "b"]
+    # a copy has the same content and shares the entry
+    copy = write(tmp_path.joinpath("copy"), "a b")
+    assert ParseCache(tmp_path.joinpath("cache"), "test").load(copy, fail) == [
+        "a",
+        "b",
+    ]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write(board, "a b c")
+    assert cache.load(board, parse) == ["a", "b", "c"]
+
+
+def test_store_generated_file(tmp_path: Path):
+    cache = ParseCache(tmp_path.joinpath("cache"), "test")
+    board = write(tmp_path.joinpath("board"), "a b")
+    cache.load(board, parse)
+
+    # e.g a build dumping the board from its tree
+    write(board, "x y")
+    cache.store(board, ["x", "y"])
+
+    assert cache.load(board, fail) == ["x", "y"]
+    assert cache.misses == 1
+
+
+def test_entries_are_bounded(tmp_path: Path):
+    cache = ParseCache(tmp_path.joinpath("cache"), "test", max_entries=2)
+    boards = [
+        write(tmp_path.joinpath(f"board{i}"), f"board {i}", mtime_ns=i * 10**9)
+        for i in range(3)
+    ]
+
+    cache.load(boards[0], parse)
+    cache.load(boards[1], parse)
+    # used again, board1 is the least recently used one now
+    cache.load(boards[0], fail)
+    cache.load(boards[2], parse)
+
+    assert len(list(cache.cache_dir.glob("*.pickle"))) == 2
+    assert cache.load(boards[0], fail) == ["board", "0"]
+    assert cache.load(boards[1], parse) == ["board", "1"]
+
+
+def test_stale_stamps_are_pruned(tmp_path: Path):
+    cache = ParseCache(tmp_path.joinpath("cache"), "test", max_entries=1)
+    scratch = write(tmp_path.joinpath("scratch"), "scratch")
+    board = write(tmp_path.joinpath("board"), "board")
+
+    cache.load(scratch, parse)
+    scratch.unlink()
+    cache.load(board, parse)
+
+    stamps = json.loads(cache.stamps_path.read_text())
+    assert list(stamps) == [str(board.resolve())]
+
+
+def test_corrupt_entry_is_parsed_again(tmp_path: Path):
+    cache = ParseCache(tmp_path.joinpath("cache"), "test")
+    board = write(tmp_path.joinpath("board"), "a b")
+    cache.load(board, parse)
+
+    (entry,) = cache.cache_dir.glob("*.pickle")
+    entry.write_bytes(b"not a pickle")
+
+    assert cache.load(board, parse) == ["a", "b"]
+    assert cache.load(board, fail) == ["a", "b"]
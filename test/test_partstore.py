@@ -0,0 +1,154 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pixelcard.libs.partstore import (
+    EASYEDA_CACHE,
+    FOOTPRINTS,
+    MODELS,
+    PartsStore,
+    pack_parts,
+)
+
+
+def add_part(build: Path, libs: Path, partno: str, package: str, model: bool):
+    easyeda = build.joinpath(EASYEDA_CACHE, partno)
+    easyeda.parent.mkdir(parents=True, exist_ok=True)
+    easyeda.write_text(
+        json.dumps({"lcsc": {"number": partno}, "packageDetail": {"title": package}})
+    )
+
+    footprint = libs.joinpath(FOOTPRINTS, f"{package}.kicad_mod")
+    footprint.parent.mkdir(parents=True, exist_ok=True)
+    model_line = f'(model "${{KIPRJMOD}}/3dmodels/{package}.wrl")' if model else ""
+    footprint.write_text(f'(footprint "{package}" {model_line})')
+    if model:
+        models = libs.joinpath(MODELS)
+        models.mkdir(parents=True, exist_ok=True)
+        models.joinpath(f"{package}.wrl").write_text(f"wrl {package}")
+        models.joinpath(f"{package}.step").write_text(f"step {package}")
+
+
+@pytest.fixture
+def folders(tmp_path: Path):
+    build, libs = tmp_path.joinpath("build"), tmp_path.joinpath("libs")
+    add_part(build, libs, "C1", "R0402", model=True)
+    add_part(build, libs, "C2", "R0402", model=True)
+    add_part(build, libs, "C3", "LED0402", model=False)
+    return build, libs
+
+
+@pytest.fixture
+def store(tmp_path: Path, folders):
+    path = tmp_path.joinpath("parts.pack")
+    assert pack_parts(path, *folders) == 3
+    with PartsStore(path) as store:
+        yield store
+
+
+def test_pack_and_lookup(store: PartsStore, folders):
+    build, libs = folders
+    assert set(store.parts) == {"C1", "C2", "C3"}
+    assert "C1" in store and "C4" not in store
+    assert [f.path for f in store.parts["C1"]] == [
+        (EASYEDA_CACHE / "C1").as_posix(),
+        (FOOTPRINTS / "R0402.kicad_mod").as_posix(),
+        (MODELS / "R0402.wrl").as_posix(),
+        (MODELS / "R0402.step").as_posix(),
+    ]
+    for partno, files in store.parts.items():
+        for file in files:
+            folder = build if file.root == "build" else libs
+            assert store.read(file) == folder.joinpath(file.path).read_bytes()
+
+
+def test_shared_files_are_stored_once(store: PartsStore):
+    c1, c2 = store.parts["C1"], store.parts["C2"]
+    assert c1[0].offset != c2[0].offset
+    assert c1[1:] == c2[1:]
+
+
+def test_pack_selected_parts(tmp_path: Path, folders):
+    path = tmp_path.joinpath("selected.pack")
+    assert pack_parts(path, *folders, ["C3"]) == 1
+    with PartsStore(path) as store:
+        assert list(store.parts) == ["C3"]
+
+
+def test_easyeda_data(store: PartsStore):
+    assert store.easyeda_data("C3")["packageDetail"]["title"] == "LED0402"
+    assert store.easyeda_data("C4") is None
+
+
+def test_in_libs(store: PartsStore, folders, tmp_path: Path):
+    _, libs = folders
+    assert store.in_libs("C1", libs)
+    assert not store.in_libs("C1", tmp_path.joinpath("empty"))
+    assert not store.in_libs("C4", libs)
+
+
+def test_materialize(store: PartsStore, folders, tmp_path: Path):
+    build, libs = folders
+    new_build, new_libs = tmp_path.joinpath("b2"), tmp_path.joinpath("l2")
+    assert store.materialize("C1", new_build, new_libs)
+    assert not store.materialize("C4", new_build, new_libs)
+    for file in store.parts["C1"]:
+        old, new = (build, new_build) if file.root == "build" else (libs, new_libs)
+        assert (
+            new.joinpath(file.path).read_bytes() == old.joinpath(file.path).read_bytes()
+        )
+
+
+def test_not_a_store(tmp_path: Path):
+    path = tmp_path.joinpath("bad.pack")
+    path.write_bytes(b"NOTPARTS" + bytes(8))
+    with pytest.raises(ValueError):
+        PartsStore(path)
+
+
+class _Importer:
+    def __init__(self, easyeda_cp_cad_data, download_raw_3d_model=None):
+        self.output = ("model", easyeda_cp_cad_data["lcsc"]["number"])
+
+    def get_footprint(self):
+        return ("footprint", self.output[1])
+
+    def get_symbol(self):
+        return ("symbol", self.output[1])
+
+
+def test_install_serves_parts_from_memory(store: PartsStore, folders, tmp_path):
+    _, libs = folders
+    downloaded = []
+
+    def download_easyeda_info(partno: str, get_model: bool = True):
+        downloaded.append(partno)
+        return "downloaded"
+
+    lcsc = SimpleNamespace(
+        LIB_FOLDER=libs,
+        download_easyeda_info=download_easyeda_info,
+        EasyedaFootprintImporter=_Importer,
+        Easyeda3dModelImporter=_Importer,
+        EasyedaSymbolImporter=_Importer,
+        ExporterFootprintKicad=lambda fp: ("exporter", fp),
+        Exporter3dModelKicad=lambda model: ("exporter", model),
+    )
+    store.install(lcsc)
+
+    exporter, model_exporter, footprint, model, symbol = lcsc.download_easyeda_info(
+        "C1"
+    )
+    assert exporter == ("exporter", ("footprint", "C1"))
+    assert symbol == ("symbol", "C1")
+    assert downloaded == []
+
+    # not in the store, or footprint missing in libs: faebryk downloads it
+    assert lcsc.download_easyeda_info("C4") == "downloaded"
+    lcsc.LIB_FOLDER = tmp_path.joinpath("empty")
+    assert lcsc.download_easyeda_info("C1") == "downloaded"
+    assert downloaded == ["C4", "C1"]
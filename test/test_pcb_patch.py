@@ -0,0 +1,100 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from pixelcard.libs.pcb_patch import patch_items
+from pixelcard.libs.sexp import loads
+
+
+def footprint(ref: str, x: float, uuid: str, value: str = "LED") -> str:
+    return (
+        f'(footprint "LED_0402"\n'
+        f"\t\t(at {x} 0)\n"
+        f'\t\t(property "Reference" "{ref}")\n'
+        f'\t\t(property "Value" "{value}")\n'
+        f'\t\t(uuid "{uuid}")\n'
+        f"\t)"
+    )
+
+
+def board(*items: str) -> str:
+    return (
+        "(kicad_pcb\n\t(version 20240108)\n"
+        + "".join(f"\t{item}\n" for item in items)
+        + ")\n"
+    )
+
+
+def test_unchanged_board_is_kept():
+    old = board('(net 0 "")', footprint("D1", 1, "a"), footprint("D2", 2, "b"))
+    patched, stats = patch_items(old, old)
+    assert patched == old
+    assert (stats.kept, stats.replaced, stats.added, stats.removed) == (4, 0, 0, 0)
+
+
+def test_regenerated_uuids_and_number_format_are_no_change():
+    old = board(footprint("D1", 1.0, "a").replace("\t\t", "    "))
+    new = board(footprint("D1", 1, "b"))
+    patched, stats = patch_items(old, new)
+    assert patched == old
+    assert stats.replaced == 0
+
+
+def test_moved_footprint_only_changes_its_position():
+    # own formatting, the patch has to keep it
+    d1 = footprint("D1", 1, "a").replace("\t\t", "  ")
+    old = board(d1, footprint("D2", 2, "b"))
+    new = board(footprint("D1", 5, "a"), footprint("D2", 2, "b"))
+    patched, stats = patch_items(old, new)
+    assert patched == old.replace("(at 1 0)", "(at 5 0)")
+    assert stats.replaced == 1
+    assert stats.kept == 2
+
+
+def test_footprints_are_matched_by_reference():
+    old = board(footprint("D1", 1, "a"), footprint("D2", 2, "b"))
+    # uuids regenerated and order swapped, D1 changed
+    new = board(footprint("D2", 2, "y"), footprint("D1", 3, "x", value="LED2"))
+    patched, stats = patch_items(old, new)
+    assert stats.added == 0
+    assert stats.removed == 0
+    tree = loads(patched)
+    # old order kept
+    assert tree[2][2][1:] == [3, 0]
+    assert tree[3][2][1:] == [2, 0]
+
+
+def test_added_and_removed_items():
+    old = board(footprint("D1", 1, "a"), footprint("D2", 2, "b"))
+    new = board(footprint("D1", 1, "a"), footprint("D3", 3, "c"))
+    patched, stats = patch_items(old, new)
+    assert (stats.added, stats.removed) == (1, 1)
+    assert loads(patched) == loads(new)
+
+
+def test_added_item_goes_after_its_predecessor():
+    old = board('(net 0 "")', footprint("D1", 1, "a"))
+    new = board('(net 0 "")', '(net 1 "GND")', footprint("D1", 1, "a"))
+    patched, _ = patch_items(old, new)
+    assert patched == new
+
+
+def test_zones_are_matched_by_name_and_layer():
+    def zone(layer: str, x: float, uuid: str) -> str:
+        return (
+            f'(zone (net 0) (layer "{layer}") (uuid "{uuid}") (name "Text")'
+            f" (polygon (pts (xy {x} 0) (xy 1 1))))"
+        )
+
+    old = board(zone("F.SilkS", 0, "a"), zone("B.SilkS", 0, "b"))
+    new = board(zone("F.SilkS", 2, "c"), zone("B.SilkS", 0, "d"))
+    patched, stats = patch_items(old, new)
+    assert (stats.kept, stats.replaced, stats.added, stats.removed) == (2, 1, 0, 0)
+    assert "(xy 2 0)" in patched
+    assert '(uuid "b")' in patched
+
+
+def test_empty_board_takes_the_new_one():
+    new = board(footprint("D1", 1, "a"))
+    patched, stats = patch_items("(kicad_pcb)", new)
+    assert patched == new
+    assert stats.added == 2
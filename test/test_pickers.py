@@ -0,0 +1,58 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+pytest.importorskip("faebryk")
+
+from faebryk.library.Constant import Constant  # noqa: E402
+from faebryk.library.Range import Range  # noqa: E402
+from faebryk.library.Resistor import Resistor  # noqa: E402
+from faebryk.libs.picker.picker import (  # noqa: E402
+    Part,
+    PickerOption,
+    Supplier,
+    has_part_picked,
+)
+from pixelcard.pickers import PickCache  # noqa: E402
+
+
+class _Supplier(Supplier):
+    def attach(self, module, part):
+        pass
+
+
+OPTIONS = [
+    PickerOption(
+        part=Part(partno=f"R{value:g}", supplier=_Supplier()),
+        params={"resistance": Constant(value)},
+    )
+    for value in [100, 200, 1e3, 5.1e3]
+]
+
+
+def picked(cache: PickCache, resistance) -> str:
+    resistor = Resistor()
+    resistor.PARAMs.resistance.merge(resistance)
+    cache.pick(resistor, OPTIONS)
+    return resistor.get_trait(has_part_picked).get_part().partno
+
+
+def test_constants_are_cached():
+    cache = PickCache()
+    assert picked(cache, Constant(1e3)) == "R1000"
+    assert picked(cache, Constant(1e3)) == "R1000"
+    assert picked(cache, Constant(200)) == "R200"
+
+    assert (cache.hits, cache.misses, cache.uncached) == (1, 2, 0)
+
+
+def test_ranges_are_not_cached():
+    cache = PickCache()
+    # ranges go through the full option list every time
+    assert picked(cache, Range(150, 6e3)) == "R200"
+    assert picked(cache, Range(900, 6e3)) == "R1000"
+    assert picked(cache, Range(150, 6e3)) == "R200"
+
+    assert (cache.hits, cache.misses, cache.uncached) == (0, 0, 3)
+    assert not cache.picks
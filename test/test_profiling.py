@@ -0,0 +1,73 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import json
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from pixelcard.libs.profiling import StageProfiler
+
+
+def test_disabled(tmp_path: Path):
+    profiler = StageProfiler(cprofile_dir=tmp_path.joinpath("cprofile"), memory=True)
+    with profiler.stage("app"):
+        pass
+
+    assert profiler.stages == []
+    assert profiler.write_report(tmp_path.joinpath("profile")) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_enabled(tmp_path: Path):
+    profiler = StageProfiler(enabled=True)
+    with profiler.stage("sleep"):
+        time.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        with profiler.stage("failing"):
+            raise RuntimeError()
+
+    assert [s.name for s in profiler.stages] == ["sleep", "failing"]
+    assert profiler.stages[0].wall_time_s >= 0.01
+    assert profiler.stages[0].cpu_time_s < profiler.stages[0].wall_time_s
+    assert all(s.peak_memory_bytes is None for s in profiler.stages)
+
+    path = profiler.write_report(tmp_path, led_text="Pi", led_text_length=2)
+    assert path is not None and path.parent == tmp_path
+    report = json.loads(path.read_text())
+    assert report["led_text"] == "Pi" and report["led_text_length"] == 2
+    assert not report["memory_traced"] and not report["cprofiled"]
+    assert [s["name"] for s in report["stages"]] == ["sleep", "failing"]
+
+
+def test_memory():
+    profiler = StageProfiler(enabled=True, memory=True)
+    with profiler.stage("allocate"):
+        data = bytearray(8 * 2**20)
+        del data
+    with profiler.stage("idle"):
+        pass
+
+    allocate, idle = profiler.stages
+    assert allocate.peak_memory_bytes >= 8 * 2**20
+    # the peak is reset per stage
+    assert idle.peak_memory_bytes < 2**20
+    assert not tracemalloc.is_tracing()
+
+
+def test_cprofile(tmp_path: Path):
+    cprofile_dir = tmp_path.joinpath("cprofile")
+    profiler = StageProfiler(enabled=True, cprofile_dir=cprofile_dir)
+    with profiler.stage("sleep"):
+        time.sleep(0.001)
+    with profiler.stage("pick"):
+        sorted(range(1000), key=str)
+
+    assert sorted(p.name for p in cprofile_dir.iterdir()) == [
+        "01_sleep.prof",
+        "02_pick.prof",
+    ]
+    stats = pstats.Stats(str(cprofile_dir.joinpath("02_pick.prof")))
+    assert any(name == "<built-in method builtins.sorted>" for *_, name in stats.stats)
@@ -0,0 +1,69 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from pathlib import Path
+
+import pytest
+import sexpdata
+from pixelcard.libs.sexp import iter_items, loads, quote
+
+BOARD = Path(__file__).parent.parent.joinpath("source", "main.kicad_pcb")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "(a)",
+        "()",
+        "(kicad_pcb (version 20221018) (generator pcbnew))",
+        '(net 1 "GND")',
+        '(text "a \\"quoted\\" word" (at 1.5 -2 90))',
+        '(s "tab\\tnew\\nline back\\\\slash \\q")',
+        "(n 1 -2 +3 1.0 -0.5 .5 1e3 2.5E-2 1. 0x10 1-2 1.2.3)",
+        "(sym foo F.Cu *.Cu ${KIPRJMOD} a:b)",
+        "(c nil t (nil) (t))",
+        '(uuid "5a4b0c5e-0000-4000-8000-000000000000")',
+        "(a\n\t(b  c)\r\n  (d (e (f))))",
+        '(empty "")',
+    ],
+)
+def test_loads_matches_sexpdata(text: str):
+    assert loads(text) == sexpdata.loads(text)
+
+
+@pytest.mark.skipif(not BOARD.exists(), reason="no board")
+def test_loads_matches_sexpdata_on_board():
+    text = BOARD.read_text()
+    assert loads(text) == sexpdata.loads(text)
+
+
+def test_loads_shares_atoms():
+    tree = loads('(a (layer "F.Cu") (layer "F.Cu") (x y) (x y))')
+    assert tree[1][1] is tree[2][1]
+    assert tree[3][0] is tree[4][0]
+
+
+def test_loads_nil_is_not_shared():
+    tree = loads("(a nil nil)")
+    tree[1].append(1)
+    assert tree[2] == []
+
+
+@pytest.mark.parametrize("text", ["(a", "(a))", "(a) (b)", "", "a b"])
+def test_loads_rejects_unbalanced(text: str):
+    with pytest.raises(ValueError):
+        loads(text)
+
+
+def test_iter_items():
+    text = '(root (a 1) (b "(not a paren" (c)) (d))'
+    assert [text[s:e] for s, e in iter_items(text)] == [
+        "(a 1)",
+        '(b "(not a paren" (c))',
+        "(d)",
+    ]
+
+
+@pytest.mark.parametrize("value", ["plain", 'with "quotes"', "back\\slash", ""])
+def test_quote_roundtrip(value: str):
+    assert loads(f"(s {quote(value)})")[1] == value
@@ -0,0 +1,122 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import math
+import random
+
+import pytest
+from pixelcard.libs.spatial_routing import (
+    Edge,
+    Point2D,
+    minimum_spanning_tree,
+    row_chain,
+    track_length,
+)
+
+
+def prim_length(points: list[Point2D]) -> float:
+    # O(N^2) reference
+    best = {i: math.dist(points[0], p) for i, p in enumerate(points) if i}
+    total = 0.0
+    while best:
+        i = min(best, key=best.__getitem__)
+        total += best.pop(i)
+        for j in best:
+            best[j] = min(best[j], math.dist(points[i], points[j]))
+    return total
+
+
+def is_spanning_tree(n: int, edges: list[Edge]) -> bool:
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for a, b in edges:
+        ra, rb = find(a), find(b)
+        if ra == rb:
+            return False
+        parent[ra] = rb
+    return len(edges) == n - 1
+
+
+def is_path(n: int, edges: list[Edge]) -> bool:
+    order = [edges[0][0]] + [b for _, b in edges]
+    chained = all(a == b for (_, a), (b, _) in zip(edges, edges[1:]))
+    return chained and sorted(order) == list(range(n))
+
+
+def grid(n: int, seed: int) -> list[Point2D]:
+    rng = random.Random(seed)
+    cells = rng.sample(range(n * 2), n)
+    return [((c % 13) * 1.6, (c // 13) * 2.4) for c in cells]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mst_is_minimal(seed: int):
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 50), rng.uniform(0, 30)) for _ in range(60)]
+    edges = minimum_spanning_tree(points)
+    assert is_spanning_tree(len(points), edges)
+    assert track_length(points, edges) == pytest.approx(prim_length(points))
+
+
+def test_mst_on_led_grid():
+    points = grid(80, 0)
+    edges = minimum_spanning_tree(points)
+    assert is_spanning_tree(len(points), edges)
+    assert track_length(points, edges) == pytest.approx(prim_length(points))
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        [(0, 0), (1, 0), (2, 0), (3, 0)],  # collinear
+        [(0, 0), (1, 1), (0, 0), (2, 2)],  # duplicate
+        [(0, 0), (5, 5)],
+    ],
+)
+def test_mst_degenerate(points: list[Point2D]):
+    edges = minimum_spanning_tree(points)
+    assert is_spanning_tree(len(points), edges)
+    assert track_length(points, edges) == pytest.approx(prim_length(points))
+
+
+@pytest.mark.parametrize("router", [minimum_spanning_tree, row_chain])
+def test_fewer_than_two_pads(router):
+    args = (0.5,) if router is row_chain else ()
+    assert router([], *args) == []
+    assert router([(1, 1)], *args) == []
+
+
+def test_row_chain_snakes_row_by_row():
+    points = [(x, y) for y in [0, 2.4, 4.8] for x in [3.2, 0, 1.6]]
+    edges = row_chain(points, row_tolerance=1.2)
+    assert is_path(len(points), edges)
+    order = [points[i] for i in [edges[0][0]] + [b for _, b in edges]]
+    assert order == [
+        (0, 0), (1.6, 0), (3.2, 0),
+        (3.2, 2.4), (1.6, 2.4), (0, 2.4),
+        (0, 4.8), (1.6, 4.8), (3.2, 4.8),
+    ]  # fmt: skip
+
+
+def test_row_chain_tolerates_row_jitter():
+    points = [(0, 0), (1, 0.1), (2, -0.1), (0, 2.4), (1, 2.5)]
+    edges = row_chain(points, row_tolerance=1.2)
+    assert is_path(len(points), edges)
+    # one step between the rows only
+    assert sum(abs(points[a][1] - points[b][1]) > 1 for a, b in edges) == 1
+
+
+def test_row_chain_on_led_grid():
+    points = grid(80, 1)
+    edges = row_chain(points, row_tolerance=1.2)
+    assert is_path(len(points), edges)
+    assert track_length(points, edges) >= prim_length(points)
+
+
+def test_track_length():
+    assert track_length([(0, 0), (3, 4), (3, 0)], [(0, 1), (1, 2)]) == 9
@@ -0,0 +1,63 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("faebryk")
+
+from faebryk.exporters.pcb.routing.util import Path  # noqa: E402
+from faebryk.library.Electrical import Electrical  # noqa: E402
+from pixelcard.library.has_pcb_routing_strategy_spatial import (  # noqa: E402
+    has_pcb_routing_strategy_spatial,
+)
+
+Topology = has_pcb_routing_strategy_spatial.Topology
+LAYERS = ["F.Cu", "B.Cu"]
+transformer = SimpleNamespace(get_layer_id=LAYERS.index)
+
+
+def test_off_layer_pads_get_vias():
+    hv = Electrical()
+    strategy = has_pcb_routing_strategy_spatial(
+        {hv: Topology.MST}, layers={hv: "B.Cu"}, via_offset=(1, 0)
+    )
+    # pads on F.Cu, keys stand in for the pads
+    pads = {"a": (0, 0, 0, 0), "b": (5, 0, 0, 0), "c": (10, 0, 0, 0)}
+
+    path = strategy._route(transformer, pads, Topology.MST, "B.Cu")
+
+    vias = [o for o in path.path if isinstance(o, Path.Via)]
+    lines = [o for o in path.path if isinstance(o, Path.Line)]
+    tracks = [o for o in path.path if isinstance(o, Path.Track)]
+    assert [v.pos[:2] for v in vias] == [(1, 0), (6, 0), (11, 0)]
+    assert all(line.layer == 0 for line in lines) and len(lines) == 3
+    assert len(tracks) == 2 and all(t.layer == "B.Cu" for t in tracks)
+    assert {p for t in tracks for p in t.points} == {(1, 0), (6, 0), (11, 0)}
+
+
+def test_same_layer_pads_connect_directly():
+    strategy = has_pcb_routing_strategy_spatial({}, default=Topology.ROW_CHAIN)
+    pads = {"a": (0, 0, 0, 0), "b": (5, 0, 0, 0)}
+
+    path = strategy._route(transformer, pads, Topology.ROW_CHAIN, "F.Cu")
+
+    assert [type(o) for o in path.path] == [Path.Track]
+    assert path.path[0].points == [(0, 0), (5, 0)]
+
+
+def test_nets_need_layers_of_their_own():
+    hv, lv = Electrical(), Electrical()
+
+    with pytest.raises(ValueError):
+        # hv on the layer of the cell nets
+        has_pcb_routing_strategy_spatial({hv: Topology.MST}, default=Topology.MST)
+    with pytest.raises(ValueError):
+        has_pcb_routing_strategy_spatial(
+            {hv: Topology.MST, lv: Topology.MST}, layers={hv: "B.Cu", lv: "B.Cu"}
+        )
+
+    has_pcb_routing_strategy_spatial(
+        {hv: Topology.MST}, default=Topology.MST, layers={hv: "B.Cu"}
+    )